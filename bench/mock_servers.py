@@ -0,0 +1,493 @@
+import base64
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+def iso(timestamp):
+    """Format epoch seconds the way Canvas and Todoist do."""
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+# Canvas's answer to reading something the user may not see; a bad token also sends WWW-Authenticate
+UNAUTHORIZED = (401, {'status': "unauthorized", 'errors': [{'message': "user not authorized to perform that action"}]}, None)
+INVALID_TOKEN = (401, {'errors': [{'message': "Invalid access token."}]}, {'WWW-Authenticate': 'Bearer realm="canvas-lms"'})
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Request handler that hands every request to its MockServer."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.mock.handle(self, "GET")
+
+    def do_POST(self):
+        self.server.mock.handle(self, "POST")
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+class MockServer:
+    """Local HTTP server with injectable latency and throttling that counts its requests.
+
+    latency is added to every response, in seconds. With throttle_every=N,
+    every Nth request is answered with 429 and a Retry-After of retry_after
+    seconds instead of being handled.
+    """
+
+    routes = ()  # (method, path regex, handler method name)
+
+    def __init__(self, latency=0.0, throttle_every=0, retry_after=0):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.counts = {}  # "METHOD route" -> requests
+        self.httpd = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        """Start serving on a free local port in a background thread."""
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def reset_counts(self):
+        with self.lock:
+            self.requests = 0
+            self.throttled = 0
+            self.counts = {}
+
+    def handle(self, handler, method):
+        url = urlparse(handler.path)
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, url.path) if route_method == method else None
+            if match:
+                break
+        else:
+            handler.read_body()
+            return handler.send_json(404, {'error': f"No route for {method} {url.path}"})
+
+        with self.lock:
+            self.requests += 1
+            self.counts[f"{method} {pattern}"] = self.counts.get(f"{method} {pattern}", 0) + 1
+            throttle = self.throttle_every and self.requests % self.throttle_every == 0
+            if throttle:
+                self.throttled += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        body = handler.read_body()
+        if throttle:
+            return handler.send_json(429, {'error': "Too many requests"}, {'Retry-After': str(self.retry_after)})
+
+        query = parse_qs(url.query)
+        status, payload, headers = getattr(self, name)(handler, query, body, *match.groups())
+        handler.send_json(status, payload, headers)
+
+class MockCanvas(MockServer):
+    """Stand-in for the Canvas REST API with N courses of M assignments each.
+
+    Half of each course's assignments are past due. Assignment listings are
+    paginated with Link headers, honour bucket=future and per_page, and
+    answer If-None-Match with 304 while the page is unchanged. Assignment
+    calendar events can be listed for up to ten courses at once, and GraphQL
+    answers course(id:) assignment pages under the aliases the sync uses.
+    It matches queries by pattern rather than running a GraphQL engine.
+    """
+
+    routes = (
+        ("GET", r"/api/v1/users/(\w+)", 'get_user'),
+        ("GET", r"/api/v1/users/(\w+)/courses", 'get_courses'),
+        ("GET", r"/api/v1/courses/(\d+)/assignments", 'get_assignments'),
+        ("GET", r"/api/v1/courses/(\d+)/assignments/(\d+)", 'get_assignment'),
+        ("GET", r"/api/v1/calendar_events", 'get_calendar_events'),
+        ("POST", r"/api/graphql", 'post_graphql'),
+    )
+
+    def __init__(self, courses=10, assignments=50, max_per_page=50, **kwargs):
+        super().__init__(**kwargs)
+        self.max_per_page = max_per_page
+        now = int(time.time())
+        self.courses = [{
+            'id': course_id,
+            'name': f"Course {course_id}",
+            'course_code': f"C{course_id}",
+            'workflow_state': 'available',
+            'term': {'id': 1, 'name': "Term", 'end_at': iso(now + 120 * 86400)},
+        } for course_id in range(1, courses + 1)]
+        self.assignments = {}
+        self.unauthorized = set()  # Course and assignment IDs the user may not read
+        self.revoked = set()  # Course and assignment IDs whose reads answer as if the token were revoked
+        for course in self.courses:
+            self.assignments[course['id']] = [{
+                'id': course['id'] * 100000 + number,
+                'course_id': course['id'],
+                'name': f"Assignment {number}",
+                # Odd assignments are due over the next weeks, even ones are past due
+                'due_at': iso(now + number * 3600 if number % 2 else now - number * 3600),
+                'updated_at': iso(now - 86400),
+                'html_url': f"https://canvas.example.com/courses/{course['id']}/assignments/{number}",
+                'description': "<p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p>",
+                'points_possible': 10,
+            } for number in range(assignments)]
+
+    def upcoming(self, course_id):
+        """Get a course's assignments that are still due in the future."""
+        now = iso(time.time())
+        return [a for a in self.assignments[course_id] if a['due_at'] and a['due_at'] > now]
+
+    def touch(self, course_id, count=1):
+        """Push the due date of the first few upcoming assignments of a course back by a day."""
+        for assignment in self.upcoming(course_id)[:count]:
+            due = datetime.datetime.fromisoformat(assignment['due_at'].replace('Z', '+00:00'))
+            assignment['due_at'] = iso(due.timestamp() + 86400)
+            assignment['updated_at'] = iso(time.time())
+
+    def rename(self, course_id, assignment_id, name):
+        self.edit(course_id, assignment_id, name=name)
+
+    def submit(self, course_id, assignment_id):
+        self.edit(course_id, assignment_id, submission={
+            'workflow_state': 'submitted', 'submitted_at': iso(time.time()),
+        })
+
+    def remove(self, course_id, assignment_id):
+        self.assignments[course_id] = [a for a in self.assignments[course_id] if a['id'] != assignment_id]
+
+    def edit(self, course_id, assignment_id, **changes):
+        for assignment in self.assignments[course_id]:
+            if assignment['id'] == assignment_id:
+                assignment.update(changes, updated_at=iso(time.time()))
+
+    def etag(self, assignments):
+        digest = hashlib.sha1(json.dumps(assignments, sort_keys=True).encode()).hexdigest()
+        return f'"{digest}"'
+
+    def page(self, handler, query, items):
+        """Slice items by page and per_page and build the Link header."""
+        per_page = min(int(query.get('per_page', ['10'])[0]), self.max_per_page)
+        page = int(query.get('page', ['1'])[0])
+        headers = {'X-Rate-Limit-Remaining': '700.0', 'X-Request-Cost': '0.5'}
+        if page * per_page < len(items):
+            # Like Canvas, the next link keeps every other query parameter
+            params = dict(query, page=[page + 1], per_page=[per_page])
+            path = urlparse(handler.path).path
+            next_url = f"http://{handler.headers['Host']}{path}?{urlencode(params, doseq=True)}"
+            headers['Link'] = f'<{next_url}>; rel="next"'
+        return items[(page - 1) * per_page:page * per_page], headers
+
+    def render(self, assignment, query, excluded=()):
+        """Build an assignment's JSON, with its submission only when it was asked for."""
+        data = {k: v for k, v in assignment.items() if k not in excluded and k != 'submission'}
+        if 'submission' in query.get('include[]', []):
+            data['submission'] = assignment.get('submission') or {'workflow_state': 'unsubmitted', 'submitted_at': None}
+        return data
+
+    def get_assignment(self, handler, query, body, course_id, assignment_id):
+        if {int(course_id), int(assignment_id)} & self.revoked:
+            return INVALID_TOKEN
+        if {int(course_id), int(assignment_id)} & self.unauthorized:
+            return UNAUTHORIZED
+        for assignment in self.assignments.get(int(course_id), []):
+            if assignment['id'] == int(assignment_id):
+                return 200, self.render(assignment, query), None
+        return 404, {'errors': [{'message': "The specified resource does not exist."}]}, None
+
+    def get_user(self, handler, query, body, user_id):
+        return 200, {'id': 1, 'name': "Benchmark Student"}, None
+
+    def get_courses(self, handler, query, body, user_id):
+        items, headers = self.page(handler, query, self.courses)
+        return 200, items, headers
+
+    def get_assignments(self, handler, query, body, course_id):
+        if int(course_id) in self.revoked:
+            return INVALID_TOKEN
+        if int(course_id) in self.unauthorized:
+            return UNAUTHORIZED
+        assignments = self.assignments.get(int(course_id))
+        if assignments is None:
+            return 404, {'errors': [{'message': "The specified resource does not exist."}]}, None
+
+        if query.get('bucket') == ['future']:
+            assignments = self.upcoming(int(course_id))
+        excluded = set(query.get('exclude_response_fields[]', []))
+        assignments = [self.render(a, query, excluded) for a in assignments]
+
+        # Like Canvas, the ETag only covers the page it comes with
+        items, headers = self.page(handler, query, assignments)
+        etag = self.etag(items)
+        if handler.headers.get('If-None-Match') == etag:
+            return 304, None, {'ETag': etag}
+        headers['ETag'] = etag
+        return 200, items, headers
+
+    def get_calendar_events(self, handler, query, body):
+        contexts = query.get('context_codes[]', [])
+        if len(contexts) > 10:
+            return 400, {'errors': [{'message': "Too many context codes"}]}, None
+        if query.get('type') != ['assignment']:
+            return 200, [], None
+        start = query.get('start_date', [iso(time.time())])[0]
+        end = query.get('end_date', [start])[0]
+
+        excluded = set(query.get('excludes[]', []))
+        events = []
+        for context_code in contexts:
+            course_id = int(context_code[len('course_'):])
+            assignments = self.assignments.get(course_id)
+            if assignments is None or course_id in self.unauthorized:
+                return UNAUTHORIZED
+            for assignment in assignments:
+                if assignment['due_at'] and start <= assignment['due_at'] <= end:
+                    events.append({
+                        'id': f"assignment_{assignment['id']}", 'title': assignment['name'],
+                        'type': 'assignment', 'context_code': context_code,
+                        'start_at': assignment['due_at'], 'end_at': assignment['due_at'],
+                        'html_url': assignment['html_url'], 'assignment': self.render(assignment, query, excluded),
+                    })
+        events.sort(key=lambda event: event['start_at'])
+        items, headers = self.page(handler, query, events)
+        return 200, items, headers
+
+    def graphql_node(self, assignment):
+        submission = assignment.get('submission') or {'workflow_state': 'unsubmitted', 'submitted_at': None}
+        return {
+            '_id': str(assignment['id']), 'name': assignment['name'], 'dueAt': assignment['due_at'],
+            'updatedAt': assignment['updated_at'], 'htmlUrl': assignment['html_url'],
+            'submissionsConnection': {'nodes': [
+                {'state': submission['workflow_state'], 'submittedAt': submission['submitted_at']},
+            ]},
+        }
+
+    def post_graphql(self, handler, query, body):
+        request = json.loads(body)
+        variables = request.get('variables') or {}
+        data = {}
+        errors = []
+        fields = re.findall(
+            r"(\w+): course\(id: \$(\w+)\) \{\s*assignmentsConnection\(first: (\d+), after: \$(\w+)\)",
+            request['query']
+        )
+        for alias, id_variable, first, after_variable in fields:
+            course_id = int(variables[id_variable])
+            assignments = self.assignments.get(course_id)
+            if assignments is None or course_id in self.unauthorized:
+                data[alias] = None
+                errors.append({'message': "not found", 'path': [alias]})
+                continue
+            cursor = variables.get(after_variable)
+            start = int(base64.b64decode(cursor)) if cursor else 0
+            end = start + min(int(first), self.max_per_page)
+            data[alias] = {'assignmentsConnection': {
+                'nodes': [self.graphql_node(assignment) for assignment in assignments[start:end]],
+                'pageInfo': {'hasNextPage': end < len(assignments),
+                             'endCursor': base64.b64encode(str(end).encode()).decode()},
+            }}
+        result = {'data': data}
+        if errors:
+            result['errors'] = errors
+        return 200, result, None
+
+class MockTodoist(MockServer):
+    """Stand-in for the Todoist v1 REST and Sync APIs.
+
+    Starts with existing_tasks unrelated tasks. Lists are paginated with
+    cursors like the real API, and Sync API commands are applied to the
+    same in-memory tasks and labels. Sync API reads return everything for
+    sync token '*' and otherwise only what changed since the token.
+    """
+
+    routes = (
+        ("GET", r"/api/v1/tasks", 'get_tasks'),
+        ("GET", r"/api/v1/tasks/completed/by_completion_date", 'get_completed_tasks'),
+        ("GET", r"/api/v1/labels", 'get_labels'),
+        ("GET", r"/api/v1/projects", 'get_projects'),
+        ("POST", r"/api/v1/tasks", 'post_task'),
+        ("POST", r"/api/v1/labels", 'post_label'),
+        ("POST", r"/api/v1/sync", 'post_sync'),
+    )
+
+    def __init__(self, existing_tasks=0, **kwargs):
+        super().__init__(**kwargs)
+        self.next_id = 1
+        self.tasks = {}
+        self.completed = {}  # Closed tasks, which only the completed tasks endpoint lists
+        self.labels = {}
+        self.deleted = {}  # Deleted tasks, kept so incremental reads can report them
+        self.failing = set()  # Task IDs whose Sync API commands fail
+        self.commands = 0
+        self.version = 0  # Sync tokens are the version they were issued at
+        self.item_versions = {}  # Task ID -> version of its last change
+        self.label_versions = {}  # Label ID -> version of its last change
+        for number in range(existing_tasks):
+            self.add_task({'content': f"Existing task {number}", 'due': {'date': iso(time.time() + 86400)}})
+
+    def new_id(self):
+        with self.lock:
+            self.next_id += 1
+            return str(self.next_id)
+
+    def changed(self, versions, object_id):
+        """Record that a task or label changed, for incremental reads."""
+        with self.lock:
+            self.version += 1
+            versions[object_id] = self.version
+
+    def add_task(self, args):
+        task_id = self.new_id()
+        due = args.get('due') or ({'date': args['due_datetime']} if args.get('due_datetime') else None)
+        self.tasks[task_id] = {
+            'id': task_id, 'content': args['content'], 'description': args.get('description', ''),
+            'labels': args.get('labels', []), 'project_id': "1", 'section_id': None, 'parent_id': None,
+            'priority': 1, 'child_order': 0, 'day_order': 0, 'checked': False, 'is_collapsed': False,
+            'user_id': "1", 'added_by_uid': "1", 'assigned_by_uid': None, 'responsible_uid': None,
+            'added_at': iso(time.time()), 'updated_at': iso(time.time()), 'completed_at': None,
+            'deadline': None, 'duration': None, 'note_count': 0,
+            'due': dict(due, is_recurring=False, string=due['date'], timezone=None, lang='en') if due else None,
+        }
+        self.changed(self.item_versions, task_id)
+        return self.tasks[task_id]
+
+    def close_task(self, task_id):
+        """Complete a task, moving it out of the active task list."""
+        task = self.tasks.pop(task_id)
+        task.update(checked=True, completed_at=iso(time.time()))
+        self.completed[task_id] = task
+        self.changed(self.item_versions, task_id)
+
+    def delete_task(self, task_id):
+        task = self.tasks.pop(task_id)
+        self.deleted[task_id] = dict(task, is_deleted=True)
+        self.changed(self.item_versions, task_id)
+
+    def update_task(self, task, args):
+        for field in ('content', 'description', 'labels'):
+            if field in args:
+                task[field] = args[field]
+        if 'due' in args:
+            due = args['due']
+            task['due'] = dict(due, is_recurring=False, string=due['date'], timezone=None, lang='en') if due else None
+        task['updated_at'] = iso(time.time())
+        self.changed(self.item_versions, task['id'])
+
+    def add_label(self, args):
+        label_id = self.new_id()
+        self.labels[label_id] = {
+            'id': label_id, 'name': args['name'], 'color': 'charcoal', 'order': len(self.labels), 'is_favorite': False,
+        }
+        self.changed(self.label_versions, label_id)
+        return self.labels[label_id]
+
+    def page(self, query, items):
+        """Slice items by cursor and limit like the v1 list endpoints."""
+        limit = min(int(query.get('limit', ['50'])[0]), 200)
+        start = int(query.get('cursor', ['0'])[0])
+        end = start + limit
+        return {'results': items[start:end], 'next_cursor': str(end) if end < len(items) else None}
+
+    def get_tasks(self, handler, query, body):
+        return 200, self.page(query, list(self.tasks.values())), None
+
+    def get_completed_tasks(self, handler, query, body):
+        since = query['since'][0]
+        until = query['until'][0]
+        tasks = [task for task in self.completed.values() if since <= task['completed_at'] <= until]
+        page = self.page(query, tasks)
+        return 200, {'items': page['results'], 'next_cursor': page['next_cursor']}, None
+
+    def get_labels(self, handler, query, body):
+        return 200, self.page(query, list(self.labels.values())), None
+
+    def get_projects(self, handler, query, body):
+        project = {
+            'id': "1", 'name': "Inbox", 'color': 'charcoal', 'order': 0, 'is_favorite': False,
+            'is_collapsed': False, 'is_shared': False, 'is_archived': False, 'is_inbox_project': True,
+            'can_assign_tasks': False, 'view_style': 'list', 'description': "", 'parent_id': None,
+            'created_at': iso(0), 'updated_at': iso(0),
+        }
+        return 200, self.page(query, [project]), None
+
+    def post_task(self, handler, query, body):
+        return 200, self.add_task(json.loads(body)), None
+
+    def post_label(self, handler, query, body):
+        return 200, self.add_label(json.loads(body)), None
+
+    def read_sync(self, sync_token):
+        """Answer a Sync API read of items and labels."""
+        # Taken first so changes made while reading are sent again next time
+        version = self.version
+        if sync_token == '*':
+            items = list(self.tasks.values())
+            labels = list(self.labels.values())
+        else:
+            since = int(sync_token)
+            all_items = {**self.deleted, **self.completed, **self.tasks}
+            items = [all_items[task_id] for task_id, version in self.item_versions.items() if version > since]
+            labels = [self.labels[label_id] for label_id, version in self.label_versions.items() if version > since]
+        return {'sync_token': str(version), 'full_sync': sync_token == '*', 'items': items, 'labels': labels}
+
+    def post_sync(self, handler, query, body):
+        form = parse_qs(body.decode())
+        if 'sync_token' in form:
+            return 200, self.read_sync(form['sync_token'][0]), None
+        commands = json.loads(form.get('commands', ['[]'])[0])
+        sync_status = {}
+        temp_id_mapping = {}
+        for command in commands:
+            self.commands += 1
+            args = command['args']
+            if args.get('id') in self.failing:
+                sync_status[command['uuid']] = {'error_code': 0, 'error': "Internal error"}
+                continue
+            if command['type'] == 'label_add':
+                temp_id_mapping[command['temp_id']] = self.add_label(args)['id']
+            elif command['type'] == 'item_add':
+                temp_id_mapping[command['temp_id']] = self.add_task(args)['id']
+            elif command['type'] == 'item_update' and args['id'] in self.completed:
+                self.update_task(self.completed[args['id']], args)
+            elif command['type'] in ('item_update', 'item_close', 'item_delete') and args['id'] not in self.tasks:
+                sync_status[command['uuid']] = {'error_code': 22, 'error': "Item not found"}
+                continue
+            elif command['type'] == 'item_update':
+                self.update_task(self.tasks[args['id']], args)
+            elif command['type'] == 'item_close':
+                self.close_task(args['id'])
+            elif command['type'] == 'item_delete':
+                self.delete_task(args['id'])
+            else:
+                sync_status[command['uuid']] = {'error_code': 0, 'error': f"Unknown command {command['type']}"}
+                continue
+            sync_status[command['uuid']] = 'ok'
+        return 200, {'sync_status': sync_status, 'temp_id_mapping': temp_id_mapping}, None
@@ -0,0 +1,134 @@
+"""Benchmark CanvasTodoistSync.sync() end to end against local mock servers.
+
+Runs a cold sync (empty caches and an empty Todoist) followed by warm
+syncs that reuse the caches on disk, and reports wall time, requests sent
+to each API and peak Python memory for every run. Nothing here touches a
+real account or the caches next to the application.
+
+    python bench/run_bench.py --courses 20 --assignments 100 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import todoist_api_python._core.endpoints as todoist_endpoints
+from canvtotodo.integration import FETCH_STRATEGIES, CanvasTodoistSync
+from mock_servers import MockCanvas, MockTodoist
+from canvtotodo.ratelimit import RateLimiter
+from canvtotodo.snapshot import CourseSnapshot
+from canvtotodo.task_cache import TaskCache
+from canvtotodo.tracing import Tracer
+
+# The mock servers only speak plain HTTP
+warnings.filterwarnings('ignore', message="Canvas may respond unexpectedly")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a full sync against local mock servers.")
+    parser.add_argument('--courses', type=int, default=10, help="number of courses")
+    parser.add_argument('--assignments', type=int, default=50, help="assignments per course, half of them upcoming")
+    parser.add_argument('--existing-tasks', type=int, default=None, help="unrelated tasks already in Todoist (default: assignments)")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every mock response")
+    parser.add_argument('--per-page', type=int, default=50, help="largest page the mock Canvas returns")
+    parser.add_argument('--throttle-every', type=int, default=0, help="answer every Nth request with 429")
+    parser.add_argument('--warm-runs', type=int, default=1, help="syncs to run after the cold one")
+    parser.add_argument('--touch', type=int, default=0, help="courses whose next due date moves before each warm run")
+    parser.add_argument('--concurrency', type=int, default=10, help="MAX_CONCURRENCY for the sync")
+    parser.add_argument('--strategy', choices=FETCH_STRATEGIES, default='auto', help="FETCH_STRATEGY for the sync")
+    parser.add_argument('--real-limits', action='store_true', help="keep the production rate limits")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    parser.add_argument('--trace', metavar='DIR', help="write a Chrome trace of each run to DIR")
+    return parser.parse_args(argv)
+
+def run_once(name, args, canvas, todoist, data_dir):
+    """Run one sync with caches in data_dir and measure it."""
+    canvas.reset_counts()
+    todoist.reset_counts()
+    todoist.commands = 0
+    messages = []
+    limiter = RateLimiter() if args.real_limits else RateLimiter(canvas_rate=1e6, todoist_rate=1e6)
+    trace_path = os.path.join(args.trace, f"{name}.trace.json") if args.trace else None
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    # The sync prints diagnostics of its own; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync = CanvasTodoistSync(
+            canvas.url, "canvas-token", "todoist-token", 1,
+            max_concurrency=args.concurrency,
+            fetch_strategy=args.strategy,
+            todoist_sync_url=todoist.url + "/api/v1/sync",
+            rate_limiter=limiter,
+            tracer=Tracer(trace_path, 'chrome'),
+            task_cache=TaskCache(os.path.join(data_dir, 'task_cache.db')),
+            course_snapshot=CourseSnapshot(os.path.join(data_dir, 'course_snapshot.json')),
+        )
+        ok = sync.sync(messages.append)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    connections = sum(session.connections_opened() for session in sync.sessions.values())
+    sync.close()
+
+    errors = [message.strip() for message in messages if 'Error' in message]
+    return {
+        'run': name,
+        'ok': ok,
+        'seconds': round(elapsed, 3),
+        'canvas_requests': canvas.requests,
+        'todoist_requests': todoist.requests,
+        'throttled': canvas.throttled + todoist.throttled,
+        'connections': connections,
+        'sync_commands': todoist.commands,
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'errors': errors[:5],
+        'requests': dict(sorted({**canvas.counts, **todoist.counts}.items())),
+    }
+
+def print_table(results):
+    columns = ('run', 'ok', 'seconds', 'canvas_requests', 'todoist_requests', 'throttled', 'connections', 'sync_commands', 'peak_mb')
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        for error in result['errors']:
+            print(f"{result['run']}: {error}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    existing_tasks = args.assignments if args.existing_tasks is None else args.existing_tasks
+    server_options = {'latency': args.latency, 'throttle_every': args.throttle_every}
+    canvas = MockCanvas(args.courses, args.assignments, max_per_page=args.per_page, **server_options).start()
+    todoist = MockTodoist(existing_tasks, **server_options).start()
+    # The Todoist client has no base URL option, so point its endpoints at the mock
+    todoist_endpoints.API_URL = todoist.url + "/api/v1"
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            results.append(run_once('cold', args, canvas, todoist, data_dir))
+            for number in range(1, args.warm_runs + 1):
+                for course in canvas.courses[:args.touch]:
+                    canvas.touch(course['id'])
+                results.append(run_once(f"warm{number}", args, canvas, todoist, data_dir))
+    finally:
+        canvas.stop()
+        todoist.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    return 0 if all(result['ok'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
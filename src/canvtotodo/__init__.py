@@ -0,0 +1 @@
+"""Sync Canvas assignments to Todoist tasks."""
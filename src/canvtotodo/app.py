@@ -0,0 +1,107 @@
+import tkinter as tk
+from tkinter import ttk
+from canvtotodo.gui import create_progress_window, center_window
+from canvtotodo.config import load_config
+from canvtotodo.integration import sync_from_config
+
+def main():
+    while True:  # Keep trying until we have a valid config
+        try:
+            # Load configuration first
+            print("Loading configuration...")
+            try:
+                config = load_config()
+                print("Configuration loaded successfully")
+                break  # Exit the loop once we have a valid config
+            except Exception as e:
+                error_msg = f"Error loading configuration: {str(e)}"
+                print(error_msg)
+                # Show error in a new window
+                error_root = tk.Tk()
+                error_root.title("Error")
+                error_label = ttk.Label(error_root, text=error_msg + "\n\nClick Close to try again.", wraplength=500)
+                error_label.pack(padx=20, pady=20)
+                close_button = ttk.Button(error_root, text="Close", command=error_root.destroy)
+                close_button.pack(pady=10)
+                error_root.mainloop()
+                continue  # Try again
+                
+        except Exception as e:
+            error_message = f"\nError: {str(e)}"
+            print(error_message)
+            # Show error in a new window
+            error_root = tk.Tk()
+            error_root.title("Error")
+            error_label = ttk.Label(error_root, text=error_message + "\n\nClick Close to try again.", wraplength=500)
+            error_label.pack(padx=20, pady=20)
+            close_button = ttk.Button(error_root, text="Close", command=error_root.destroy)
+            close_button.pack(pady=10)
+            error_root.mainloop()
+            continue  # Try again
+    
+    try:
+        # Create progress window
+        root, update_status, run_in_background = create_progress_window()
+        
+        def run_sync():
+            """Connect and sync; runs on a worker thread so the window stays responsive."""
+            # Initialize sync
+            update_status("Initializing Canvas and Todoist connection...")
+            try:
+                sync = sync_from_config(config)
+                update_status("Connection initialized successfully")
+            except Exception as e:
+                error_msg = f"Error initializing connection: {str(e)}"
+                update_status(error_msg)
+                print(error_msg)
+                raise
+            
+            # Perform sync
+            update_status("Starting sync process...")
+            try:
+                return sync.sync(update_status)
+            finally:
+                # Release the task cache so Clear Cache can delete it, also on Windows
+                sync.close()
+        
+        def sync_finished(result, error):
+            """Show the outcome and let the user close the window."""
+            if error is not None:
+                error_message = f"\nError: {str(error)}"
+                print(error_message)
+                update_status(error_message)
+            
+            # Add a close button
+            close_button = ttk.Button(root, text="Close", command=root.destroy)
+            close_button.grid(row=2, column=0, pady=(0, 10))
+            
+            # Center the window
+            center_window(root)
+        
+        run_in_background(run_sync, sync_finished)
+        root.mainloop()
+        
+    except Exception as e:
+        error_message = f"\nError: {str(e)}"
+        print(error_message)
+        
+        if 'root' in locals() and root.winfo_exists():
+            try:
+                update_status(error_message)
+                # Add a close button if it doesn't exist
+                if not any(isinstance(child, ttk.Button) for child in root.winfo_children()):
+                    close_button = ttk.Button(root, text="Close", command=root.destroy)
+                    close_button.grid(row=2, column=0, pady=(0, 10))
+                root.mainloop()
+            except Exception:
+                # If we can't update the main window, create a new error window
+                error_root = tk.Tk()
+                error_root.title("Error")
+                error_label = ttk.Label(error_root, text=error_message, wraplength=500)
+                error_label.pack(padx=20, pady=20)
+                close_button = ttk.Button(error_root, text="Close", command=error_root.destroy)
+                close_button.pack(pady=10)
+                error_root.mainloop()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
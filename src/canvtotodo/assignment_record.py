@@ -0,0 +1,53 @@
+import datetime
+
+def parse_timestamp(value):
+    """Parse a Canvas ISO 8601 date into UTC epoch seconds, or None if it has none."""
+    if not value:
+        return None
+    return int(datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+def format_timestamp(timestamp):
+    """Format UTC epoch seconds the way Canvas writes dates."""
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def is_submitted(data):
+    """Check whether the student has submitted an assignment, given its Canvas JSON."""
+    submission = data.get('submission') or {}
+    return submission.get('submitted_at') is not None or submission.get('workflow_state') in ('submitted', 'graded')
+
+class AssignmentRecord:
+    """The fields of a Canvas assignment the sync uses, taken from its JSON once.
+
+    Records replace canvasapi Assignment objects in the sync pipeline: they
+    keep no payload, requester or per-instance dict, and the due date is
+    parsed up front into UTC epoch seconds (None when there is none).
+    """
+
+    __slots__ = ('id', 'course_id', 'name', 'html_url', 'due', 'updated_at', 'submitted')
+
+    def __init__(self, assignment_id, course_id, name, html_url, due, updated_at, submitted):
+        self.id = assignment_id
+        self.course_id = course_id
+        self.name = name
+        self.html_url = html_url
+        self.due = due
+        self.updated_at = updated_at
+        self.submitted = submitted
+
+    @classmethod
+    def from_json(cls, data, course_id):
+        """Build a record from an assignment in a Canvas API response."""
+        return cls(
+            data['id'],
+            data.get('course_id', course_id),
+            data.get('name'),
+            data.get('html_url'),
+            parse_timestamp(data.get('due_at')),
+            data.get('updated_at'),
+            is_submitted(data),
+        )
+
+    @property
+    def due_at(self):
+        """The due date in Canvas's ISO 8601 form, or None."""
+        return format_timestamp(self.due) if self.due is not None else None
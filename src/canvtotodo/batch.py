@@ -0,0 +1,124 @@
+import concurrent.futures
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+from canvtotodo.config import account_dir_name, get_application_path, load_accounts
+from canvtotodo.integration import sync_from_config
+from canvtotodo.ratelimit import RateLimiter
+from canvtotodo.snapshot import CourseSnapshot
+from canvtotodo.task_cache import TaskCache
+
+# Accounts synced at once inside each worker process
+ACCOUNT_CONCURRENCY = 4
+
+def get_data_root():
+    """Get the directory that holds one data directory per batch account."""
+    return os.path.join(get_application_path(), 'accounts')
+
+def get_account_dir(data_root, name):
+    """Get an account's data directory, named after the account."""
+    return os.path.join(data_root, account_dir_name(name))
+
+def shard_accounts(accounts, workers):
+    """Split accounts into at most `workers` shards of similar size."""
+    count = max(1, min(workers, len(accounts)))
+    size, extra = divmod(len(accounts), count)
+    shards = []
+    start = 0
+    for number in range(count):
+        end = start + size + (1 if number < extra else 0)
+        shards.append(accounts[start:end])
+        start = end
+    return [shard for shard in shards if shard]
+
+def sync_account(account, data_root):
+    """Sync one account with its own rate limits, caches and data directory."""
+    name = account["NAME"]
+    errors = []
+    start = time.monotonic()
+    sync = None
+    try:
+        account_dir = get_account_dir(data_root, name)
+        os.makedirs(account_dir, exist_ok=True)
+        sync = sync_from_config(
+            account,
+            rate_limiter=RateLimiter(),
+            task_cache=TaskCache(os.path.join(account_dir, 'task_cache.db')),
+            course_snapshot=CourseSnapshot(os.path.join(account_dir, 'course_snapshot.json')),
+        )
+
+        def update_status(message):
+            if 'Error' in message:
+                errors.append(message.strip())
+
+        ok = sync.sync(update_status)
+    except Exception as e:
+        ok = False
+        errors.append(str(e))
+    finally:
+        if sync is not None:
+            sync.close()
+    return {
+        'name': name,
+        'ok': ok,
+        'seconds': round(time.monotonic() - start, 3),
+        'errors': errors,
+    }
+
+def sync_shard(accounts, data_root, account_concurrency=ACCOUNT_CONCURRENCY):
+    """Sync a shard of accounts in one worker process, a few at a time."""
+    # Diagnostics go to stderr so stdout only carries the results
+    with contextlib.redirect_stdout(sys.stderr):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=account_concurrency) as executor:
+            return list(executor.map(lambda account: sync_account(account, data_root), accounts))
+
+def run_batch(accounts, update_status=print, workers=None, data_root=None,
+              account_concurrency=ACCOUNT_CONCURRENCY):
+    """Sync many accounts across a process pool and collect a result for each."""
+    workers = workers or os.cpu_count() or 1
+    data_root = data_root or get_data_root()
+    shards = shard_accounts(accounts, workers)
+    update_status(f"Syncing {len(accounts)} accounts in {len(shards)} worker processes...")
+
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = {
+            executor.submit(sync_shard, shard, data_root, account_concurrency): shard
+            for shard in shards
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                shard_results = future.result()
+            except Exception as e:
+                # The worker process died; every account in its shard failed
+                shard_results = [{'name': account["NAME"], 'ok': False, 'seconds': 0.0, 'errors': [str(e)]}
+                                 for account in futures[future]]
+            for result in shard_results:
+                if result['ok']:
+                    update_status(f"{result['name']}: synced in {result['seconds']}s")
+                else:
+                    update_status(f"{result['name']}: failed: {'; '.join(result['errors']) or 'unknown error'}")
+            results.extend(shard_results)
+
+    failed = sum(1 for result in results if not result['ok'])
+    update_status(f"\nBatch finished: {len(results) - failed} accounts synced, {failed} failed")
+    return results
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python -m canvtotodo.batch ACCOUNTS_FILE")
+        sys.exit(2)
+    try:
+        accounts = load_accounts(sys.argv[1])
+    except Exception as e:
+        print(f"Error loading accounts: {str(e)}")
+        sys.exit(1)
+
+    results = run_batch(accounts)
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,77 @@
+from canvtotodo.assignment_record import AssignmentRecord
+
+# Assignments asked for per course in each query
+GRAPHQL_PAGE_SIZE = 100
+
+# Only the assignment fields the sync uses
+ASSIGNMENT_FIELDS = """
+      nodes {
+        _id
+        name
+        dueAt
+        updatedAt
+        htmlUrl
+        submissionsConnection(first: 1) { nodes { state submittedAt } }
+      }
+      pageInfo { hasNextPage endCursor }"""
+
+def build_query(course_count):
+    """Build a query for one page of assignments of course_count courses, each under its own alias."""
+    params = ', '.join(f"$course{number}: ID!, $after{number}: String" for number in range(course_count))
+    courses = ''.join(f"""
+  course{number}: course(id: $course{number}) {{
+    assignmentsConnection(first: {GRAPHQL_PAGE_SIZE}, after: $after{number}) {{{ASSIGNMENT_FIELDS}
+    }}
+  }}""" for number in range(course_count))
+    return f"query CourseAssignments({params}) {{{courses}\n}}"
+
+def record_from_node(node, course_id):
+    """Build an assignment record from a GraphQL assignment node."""
+    submissions = (node.get('submissionsConnection') or {}).get('nodes') or []
+    submission = submissions[0] if submissions else {}
+    return AssignmentRecord.from_json({
+        'id': int(node['_id']),
+        'name': node.get('name'),
+        'html_url': node.get('htmlUrl'),
+        'due_at': node.get('dueAt'),
+        'updated_at': node.get('updatedAt'),
+        'submission': {'submitted_at': submission.get('submittedAt'), 'workflow_state': submission.get('state')},
+    }, course_id)
+
+class CanvasGraphQL:
+    """Fetches the assignments of many courses with Canvas GraphQL queries.
+
+    Every course is asked for under its own alias in one query. Courses
+    with more pages are asked for again, each with its own cursor, until
+    none has any left, so a sync takes as many queries as its longest
+    course has pages.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+
+    def fetch_assignments(self, courses):
+        """Get the assignments of courses as {course ID: [assignment records]}."""
+        found = {course.id: [] for course in courses}
+        cursors = {course.id: None for course in courses}
+        while cursors:
+            course_ids = list(cursors)
+            variables = {}
+            for number, course_id in enumerate(course_ids):
+                variables[f"course{number}"] = str(course_id)
+                variables[f"after{number}"] = cursors[course_id]
+            result = self.canvas.graphql(build_query(len(course_ids)), variables)
+            if result.get('errors'):
+                raise Exception(f"GraphQL error: {result['errors'][0].get('message')}")
+
+            data = result.get('data') or {}
+            cursors = {}
+            for number, course_id in enumerate(course_ids):
+                course = data.get(f"course{number}")
+                if course is None:
+                    raise Exception(f"Course {course_id} not found")
+                connection = course['assignmentsConnection']
+                found[course_id].extend(record_from_node(node, course_id) for node in connection['nodes'])
+                if connection['pageInfo']['hasNextPage']:
+                    cursors[course_id] = connection['pageInfo']['endCursor']
+        return found
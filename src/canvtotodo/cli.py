@@ -0,0 +1,107 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+def make_status_printer(json_lines, stream=None):
+    """Create an update_status callback that streams status lines to stdout."""
+    stream = stream or sys.stdout
+
+    def update_status(message):
+        """Print a status message as text or as a JSON line."""
+        if json_lines:
+            line = json.dumps({'time': round(time.time(), 3), 'message': message.strip()})
+        else:
+            line = message
+        print(line, file=stream, flush=True)
+
+    return update_status
+
+def parse_args(argv=None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog='canvtotodo', description="Sync Canvas assignments to Todoist.")
+    parser.add_argument('--config', help="path to config.json (default: in the user data directory); the caches are kept next to it")
+    parser.add_argument('--json', action='store_true', help="print status as JSON lines")
+    parser.add_argument('--watch', action='store_true', help="keep running and poll Canvas on a schedule")
+    parser.add_argument('--check', action='store_true', help="only check the Canvas and Todoist credentials")
+    parser.add_argument('--accounts', metavar='PATH', help="sync every account listed in a JSON accounts file")
+    parser.add_argument('--workers', type=int, help="worker processes for --accounts (default: one per CPU)")
+    parser.add_argument('--trace', metavar='PATH', help="write phase timings and request counters of each sync to PATH")
+    parser.add_argument('--trace-format', choices=('jsonl', 'chrome'), default='jsonl',
+                        help="JSON lines appended per sync, or a Chrome trace (chrome://tracing, Perfetto) of the last sync")
+    return parser.parse_args(argv)
+
+def run(args, update_status):
+    """Load the configuration and run one sync, or keep syncing in watch mode."""
+    if args.accounts:
+        return run_accounts(args, update_status)
+
+    # Imported here so --help and argument errors never pay for the API clients
+    from canvtotodo.config import load_config
+    from canvtotodo.integration import sync_from_config
+    from canvtotodo.snapshot import CourseSnapshot
+    from canvtotodo.task_cache import TaskCache
+    from canvtotodo.tracing import Tracer
+
+    try:
+        config = load_config(args.config, interactive=False)
+        caches = {}
+        if args.config:
+            # Keep the caches next to an explicitly chosen config file
+            data_dir = os.path.dirname(os.path.abspath(args.config))
+            caches = {
+                'task_cache': TaskCache(os.path.join(data_dir, 'task_cache.db')),
+                'course_snapshot': CourseSnapshot(os.path.join(data_dir, 'course_snapshot.json')),
+            }
+        sync = sync_from_config(config, tracer=Tracer(args.trace, args.trace_format), **caches)
+    except Exception as e:
+        update_status(f"Error: {str(e)}")
+        return 1
+
+    if args.check:
+        try:
+            user = sync.validate_connections()
+        except Exception as e:
+            update_status(f"Error: {str(e)}")
+            return 1
+        update_status(f"Connected to Canvas as {user.name} and to Todoist")
+        return 0
+
+    if args.watch:
+        from canvtotodo.daemon import run_daemon
+        try:
+            run_daemon(sync, update_status)
+        except KeyboardInterrupt:
+            update_status("Stopping watch mode")
+        return 0
+
+    return 0 if sync.sync(update_status) else 1
+
+def run_accounts(args, update_status):
+    """Sync every account in an accounts file across a process pool."""
+    from canvtotodo.batch import run_batch
+    from canvtotodo.config import load_accounts
+
+    try:
+        accounts = load_accounts(args.accounts)
+    except Exception as e:
+        update_status(f"Error: {str(e)}")
+        return 1
+    results = run_batch(accounts, update_status, workers=args.workers)
+    return 0 if all(result['ok'] for result in results) else 1
+
+def main(argv=None):
+    """Headless entry point for the canvtotodo command."""
+    args = parse_args(argv)
+    update_status = make_status_printer(args.json)
+    if not args.json:
+        return run(args, update_status)
+
+    # Keep stdout to JSON lines only; other diagnostics go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        return run(args, update_status)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import json
+import re
+import shutil
+import sys
+import os
+
+def get_application_path():
+    """Get the directory the configuration and caches live in.
+
+    A bundled app keeps them next to its executable. Run from Python, they
+    go in a per-user data directory instead of the installed package.
+    """
+    if getattr(sys, 'frozen', False):
+        # If the application is run as a bundle
+        return os.path.dirname(sys.executable)
+    return get_data_dir()
+
+def get_data_dir():
+    """Get the per-user data directory, creating it if needed."""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    path = os.path.join(base, 'canvtotodo')
+    os.makedirs(path, exist_ok=True)
+    move_legacy_files(path)
+    return path
+
+# Where older versions kept the config and caches: next to the modules, in src/ of a checkout or in site-packages
+LEGACY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Files moved together, each group only if its first file isn't in the data directory yet
+LEGACY_FILES = (
+    ('config.json',),
+    ('task_cache.db', 'task_cache.db-wal', 'task_cache.db-shm'),
+    ('task_cache.json',),
+    ('course_snapshot.json',),
+    ('accounts',),
+)
+
+def move_legacy_files(data_dir):
+    """Move the config and caches of older versions into the data directory."""
+    for group in LEGACY_FILES:
+        if not os.path.exists(os.path.join(LEGACY_DIR, group[0])) or os.path.exists(os.path.join(data_dir, group[0])):
+            continue
+        for name in group:
+            source = os.path.join(LEGACY_DIR, name)
+            if not os.path.exists(source):
+                continue
+            try:
+                shutil.move(source, os.path.join(data_dir, name))
+                print(f"Moved {source} to {data_dir}")
+            except Exception as e:
+                print(f"Error moving {source} to {data_dir}: {str(e)}")
+
+def get_config_path():
+    """Get the path to the configuration file."""
+    return os.path.join(get_application_path(), 'config.json')
+
+# Settings every config.json, and every account in an accounts file, must have
+REQUIRED_FIELDS = ["CANVAS_API_URL", "CANVAS_API_KEY", "TODOIST_API_KEY", "CANVAS_USER_ID"]
+
+def validate_config(config):
+    """Check that a configuration has every required field and a numeric user ID."""
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in config]
+    if missing_fields:
+        raise Exception(f"Missing required fields in config: {', '.join(missing_fields)}")
+    
+    # Validate user ID is a number
+    try:
+        int(config["CANVAS_USER_ID"])
+    except ValueError:
+        raise Exception("Canvas User ID must be a number")
+
+def load_config(config_path=None, interactive=True):
+    """Load configuration from file, launching the setup GUI if it doesn't exist.
+
+    With interactive=False a missing file is an error instead, so headless
+    runs never need a display.
+    """
+    config_path = config_path or get_config_path()
+    print(f"Looking for config file at: {config_path}")
+    
+    if not os.path.exists(config_path):
+        if not interactive:
+            raise Exception(f"No configuration file found at {config_path}. Run the desktop app once to create it.")
+        print("Config file not found, launching setup GUI...")
+        # Imported here so headless runs never load tkinter
+        from canvtotodo.gui import create_config_gui
+        create_config_gui()
+        # After GUI closes, check if config was created
+        if not os.path.exists(config_path):
+            raise Exception("Configuration was not saved. Please run the application again.")
+    
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+            print("Successfully loaded config file")
+            
+            validate_config(config)
+            return config
+            
+    except json.JSONDecodeError:
+        print("Config file is not valid JSON")
+        raise Exception("config.json is not valid JSON. Please delete the file and run the application again.")
+    except Exception as e:
+        print(f"Error loading configuration: {str(e)}")
+        raise
+
+def account_dir_name(name):
+    """Get the name of an account's data directory, without characters paths can't have."""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', name)
+
+def load_accounts(accounts_path):
+    """Load the account configurations for a batch run.
+
+    The file holds a JSON list of objects with the same fields as
+    config.json plus a unique NAME, used for the account's data directory.
+    """
+    try:
+        with open(accounts_path, 'r') as f:
+            accounts = json.load(f)
+    except json.JSONDecodeError:
+        raise Exception(f"{accounts_path} is not valid JSON")
+    if not isinstance(accounts, list):
+        raise Exception(f"{accounts_path} must contain a list of accounts")
+    
+    dir_names = {}
+    for number, account in enumerate(accounts, 1):
+        name = account.get("NAME")
+        if not name:
+            raise Exception(f"Account {number} in {accounts_path} has no NAME")
+        # Names that only differ in case or in characters paths can't have would share a data directory
+        dir_name = account_dir_name(name).lower()
+        if dir_name in dir_names:
+            other = dir_names[dir_name]
+            if other == name:
+                raise Exception(f"Account name {name} is used more than once")
+            raise Exception(f"Account names {other} and {name} are too alike; they would share a data directory")
+        dir_names[dir_name] = name
+        try:
+            validate_config(account)
+        except Exception as e:
+            raise Exception(f"Account {name}: {str(e)}")
+    return accounts
@@ -0,0 +1,126 @@
+import random
+import sys
+import threading
+import time
+from canvtotodo.config import load_config
+from canvtotodo.integration import sync_from_config
+
+# Poll intervals in seconds. Courses with a deadline coming up soon are polled more
+# often; courses that keep coming back unchanged back off towards MAX_INTERVAL.
+SOON_INTERVAL = 5 * 60
+WEEK_INTERVAL = 15 * 60
+BASE_INTERVAL = 60 * 60
+MAX_INTERVAL = 6 * 60 * 60
+SOON_WINDOW = 24 * 60 * 60
+WEEK_WINDOW = 7 * 24 * 60 * 60
+
+# Every course is synced at least this often; these full syncs also fetch the
+# course list again, bypassing the course cache, to pick up new courses
+FULL_SYNC_INTERVAL = 6 * 60 * 60
+
+# Fraction of each interval added or removed at random so polls don't line up
+JITTER = 0.1
+
+def jittered(seconds):
+    """Spread an interval by up to JITTER in either direction."""
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+class PollScheduler:
+    """Decides when each course should next be polled."""
+
+    def __init__(self):
+        self.courses = {}  # Course ID -> {'interval', 'next_poll', 'next_due'}
+        self.next_full_sync = 0.0
+
+    def due_courses(self, now=None):
+        """Get the IDs of the courses to poll now, or None for a full sync."""
+        now = now or time.time()
+        if now >= self.next_full_sync:
+            return None
+        return {course_id for course_id, state in self.courses.items() if state['next_poll'] <= now}
+
+    def base_interval(self, next_due, now):
+        """Get the poll interval for a course given its nearest deadline."""
+        if next_due is None:
+            return BASE_INTERVAL
+        if next_due - now <= SOON_WINDOW:
+            return SOON_INTERVAL
+        if next_due - now <= WEEK_WINDOW:
+            return WEEK_INTERVAL
+        return BASE_INTERVAL
+
+    def record(self, course_results, full_sync, course_ids=(), now=None):
+        """Schedule the next poll of each course from the outcome of a sync.
+
+        course_ids are the courses a partial sync asked for. Those without a
+        result (skipped, unreadable or failed) back off like unchanged
+        courses. After a full sync, courses without a result are no longer
+        active and stop being polled.
+        """
+        now = now or time.time()
+        results = dict(course_results)
+        if full_sync:
+            self.next_full_sync = now + jittered(FULL_SYNC_INTERVAL)
+            for course_id in set(self.courses) - set(results):
+                del self.courses[course_id]
+        for course_id in course_ids:
+            results.setdefault(course_id, {'changed': False, 'next_due': None})
+
+        for course_id, result in results.items():
+            state = self.courses.setdefault(course_id, {'interval': None, 'next_due': None})
+            if result['next_due'] is not None or result['changed']:
+                state['next_due'] = result['next_due']
+            if state['next_due'] is not None and state['next_due'] <= now:
+                state['next_due'] = None
+
+            interval = self.base_interval(state['next_due'], now)
+            if not result['changed'] and state['interval']:
+                # Back off while nothing changes, up to four times the deadline-based interval
+                interval = min(max(interval, state['interval'] * 2), interval * 4, MAX_INTERVAL)
+            state['interval'] = interval
+            state['next_poll'] = now + jittered(interval)
+
+    def seconds_until_next(self, now=None):
+        """Get how long to sleep before the next course is due."""
+        now = now or time.time()
+        next_poll = min([state['next_poll'] for state in self.courses.values()] + [self.next_full_sync])
+        return max(1.0, next_poll - now)
+
+def run_daemon(sync, update_status=print, stop_event=None):
+    """Keep syncing on a schedule with one long-lived CanvasTodoistSync."""
+    scheduler = PollScheduler()
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        course_ids = scheduler.due_courses()
+        if course_ids is None:
+            update_status("\nStarting full sync...")
+        else:
+            update_status(f"\nPolling {len(course_ids)} courses...")
+
+        if course_ids is None or course_ids:
+            if not sync.sync(update_status, course_ids=course_ids, refresh_courses=course_ids is None):
+                # Try again soon rather than waiting out a whole interval
+                stop_event.wait(jittered(SOON_INTERVAL))
+                continue
+            scheduler.record(sync.course_results, full_sync=course_ids is None, course_ids=course_ids or ())
+
+        wait = scheduler.seconds_until_next()
+        update_status(f"Next poll in {int(wait)} seconds")
+        stop_event.wait(wait)
+
+def main():
+    try:
+        # Never open the setup window; watch mode usually runs without a display
+        config = load_config(interactive=False)
+        sync = sync_from_config(config)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    try:
+        run_daemon(sync)
+    except KeyboardInterrupt:
+        print("\nStopping watch mode")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
-import sys
 import os
+import queue
+import threading
+from canvtotodo.config import get_config_path
+from canvtotodo.snapshot import get_snapshot_path
+from canvtotodo.task_cache import remove_cache_files
+
+# How often queued status messages are drawn, and how many at most per pass
+LOG_POLL_MS = 100
+MAX_LOG_BATCH = 500
+
+# Lines kept in the log; older ones are dropped as new ones arrive
+MAX_LOG_LINES = 2000
 
 def create_progress_window():
-    """Create a progress window to show sync status."""
+    """Create a progress window to show sync status.
+
+    Returns the window, a thread-safe update_status callback and a function
+    that runs work on a background thread and passes its result, or the
+    exception it raised, to a callback on the Tk thread.
+    """
     root = tk.Tk()
     root.title("Canvas to Todoist Sync")
     root.geometry("600x400")
@@ -32,14 +48,95 @@ def create_progress_window():
     scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
     log_text.configure(yscrollcommand=scrollbar.set)
     
+    messages = queue.Queue()
+    worker = {'thread': None}
+    after_ids = {}
+
     def update_status(message):
-        """Update the status label and log."""
-        status_label.config(text=message)
-        log_text.insert(tk.END, message + "\n")
-        log_text.see(tk.END)
-        root.update()
+        """Queue a message for the status label and log; safe to call from any thread."""
+        messages.put(message)
+
+    def drain_messages():
+        """Draw the queued messages in one batch, then check again shortly."""
+        batch = []
+        try:
+            while len(batch) < MAX_LOG_BATCH:
+                batch.append(messages.get_nowait())
+        except queue.Empty:
+            pass
+        try:
+            if batch and root.winfo_exists():
+                status_label.config(text=batch[-1])
+                log_text.insert(tk.END, "\n".join(batch) + "\n")
+                # Drop the oldest lines so the log doesn't grow without limit
+                lines = int(log_text.index('end-1c').split('.')[0])
+                if lines > MAX_LOG_LINES:
+                    log_text.delete('1.0', f"{lines - MAX_LOG_LINES + 1}.0")
+                log_text.see(tk.END)
+        except Exception as e:
+            print(f"Error updating status: {str(e)}")
+        after_ids['drain'] = root.after(LOG_POLL_MS, drain_messages)
+
+    def run_in_background(work, on_done):
+        """Run work() on a worker thread and call on_done(result, error) on the Tk thread when it finishes."""
+        result = {}
+
+        def target():
+            try:
+                result['value'] = work()
+            except Exception as e:
+                result['error'] = e
+
+        def check_done():
+            if worker['thread'].is_alive():
+                after_ids['worker'] = root.after(LOG_POLL_MS, check_done)
+                return
+            worker['thread'] = None
+            on_done(result.get('value'), result.get('error'))
+
+        # Daemon thread so closing the window doesn't wait for the sync to finish
+        worker['thread'] = threading.Thread(target=target, daemon=True)
+        worker['thread'].start()
+        after_ids['worker'] = root.after(LOG_POLL_MS, check_done)
+
+    def clear_cache():
+        """Clear the task cache file."""
+        if worker['thread'] is not None:
+            update_status("\nWait for the sync to finish before clearing the cache.")
+            return
+        try:
+            snapshot_path = get_snapshot_path()
+            if os.path.exists(snapshot_path):
+                # Without the snapshot every course is fetched in full again
+                os.remove(snapshot_path)
+            if remove_cache_files():
+                update_status("\nTask cache cleared successfully!")
+            else:
+                update_status("\nNo task cache file found.")
+        except Exception as e:
+            update_status(f"\nError clearing cache: {str(e)}")
+    
+    def on_closing():
+        """Handle window closing."""
+        try:
+            for after_id in after_ids.values():
+                root.after_cancel(after_id)
+            root.quit()
+            root.destroy()
+        except Exception:
+            pass
     
-    return root, update_status
+    # Bind Ctrl+Option+Command+Shift+Delete to clear cache
+    root.bind('<Control-Alt-Command-Shift-Delete>', lambda e: clear_cache())
+    
+    # Add cache clear button
+    clear_cache_button = ttk.Button(main_frame, text="Clear Cache (Ctrl+⌥+⌘+Shift+Delete)", command=clear_cache)
+    clear_cache_button.grid(row=2, column=0, pady=(0, 10))
+    
+    root.protocol("WM_DELETE_WINDOW", on_closing)
+    drain_messages()
+    
+    return root, update_status, run_in_background
 
 def create_config_gui():
     """Create a GUI window for users to input their API keys."""
@@ -70,8 +167,8 @@ def create_config_gui():
     canvas_key.grid(row=2, column=1, sticky=tk.W, pady=5)
     
     ttk.Label(main_frame, text="Canvas User ID:").grid(row=3, column=0, sticky=tk.W, pady=5)
-    user_id = ttk.Entry(main_frame, width=50)
-    user_id.grid(row=3, column=1, sticky=tk.W, pady=5)
+    canvas_user_id = ttk.Entry(main_frame, width=50)
+    canvas_user_id.grid(row=3, column=1, sticky=tk.W, pady=5)
     
     # Todoist API section
     ttk.Label(main_frame, text="Todoist API Settings", font=('Arial', 14, 'bold')).grid(row=4, column=0, columnspan=2, pady=(20, 20))
@@ -102,21 +199,23 @@ def create_config_gui():
     help_label = ttk.Label(main_frame, text=help_text, wraplength=500, justify=tk.LEFT)
     help_label.grid(row=6, column=0, columnspan=2, pady=20)
     
+    config_saved = [False]  # Use a list to store the state
+    
     def save_config():
         """Save the configuration and close the window."""
         config = {
             "CANVAS_API_URL": canvas_url.get().strip(),
             "CANVAS_API_KEY": canvas_key.get().strip(),
-            "TODOIST_API_KEY": todoist_key.get().strip(),
-            "CANVAS_USER_ID": user_id.get().strip()
+            "CANVAS_USER_ID": canvas_user_id.get().strip(),
+            "TODOIST_API_KEY": todoist_key.get().strip()
         }
         
         # Validate inputs
         if not all(config.values()):
             messagebox.showerror("Error", "Please fill in all fields")
             return
-        
-        # Validate user ID is numeric
+            
+        # Validate user ID is a number
         try:
             int(config["CANVAS_USER_ID"])
         except ValueError:
@@ -124,20 +223,14 @@ def create_config_gui():
             return
         
         # Save to config file
-        if getattr(sys, 'frozen', False):
-            # If the application is run as a bundle
-            application_path = os.path.dirname(sys.executable)
-        else:
-            # If the application is run from a Python interpreter
-            application_path = os.path.dirname(os.path.abspath(__file__))
-        
-        config_path = os.path.join(application_path, 'config.json')
+        config_path = get_config_path()
         print(f"Saving config to: {config_path}")
         
         try:
             with open(config_path, 'w') as f:
                 json.dump(config, f, indent=4)
             print("Config saved successfully")
+            config_saved[0] = True  # Set the flag to True
             messagebox.showinfo("Success", "Configuration saved successfully!")
             root.destroy()
         except Exception as e:
@@ -152,6 +245,7 @@ def create_config_gui():
     center_window(root)
     
     root.mainloop()
+    return config_saved[0]  # Return whether config was saved
 
 def center_window(window):
     """Center a window on the screen."""
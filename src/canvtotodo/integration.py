@@ -0,0 +1,922 @@
+import datetime
+import requests
+from canvasapi import Canvas
+from canvasapi.course import Course
+from canvasapi.exceptions import Forbidden, InvalidAccessToken, ResourceDoesNotExist, Unauthorized
+from todoist_api_python.api import TodoistAPI
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from canvtotodo.assignment_record import AssignmentRecord, format_timestamp
+from canvtotodo.canvas_graphql import CanvasGraphQL
+from canvtotodo.ratelimit import RateLimiter
+from canvtotodo.snapshot import CourseSnapshot, assignment_entries
+from canvtotodo.task_cache import TaskCache
+from canvtotodo.todoist_index import LabelIndex, TodoistIndex, iter_items, label_key, task_key
+from canvtotodo.todoist_replica import TodoistReplica
+from canvtotodo.tracing import Tracer
+from canvtotodo.todoist_sync import MAX_COMMANDS, TODOIST_SYNC_URL, CommandBatcher, TodoistSyncClient, make_command, new_temp_id
+
+def is_auth_error(error):
+    """Check whether a Todoist request failed because of bad credentials."""
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in (401, 403)
+
+def is_current_course(course):
+    """Check that a course's term, if it has one, has not ended."""
+    term = getattr(course, 'term', None)
+    if not term or not term.get('end_at'):
+        return True
+    try:
+        term_end = datetime.datetime.fromisoformat(term['end_at'].replace('Z', '+00:00'))
+    except ValueError:
+        return True
+    return term_end > datetime.datetime.now(datetime.timezone.utc)
+
+def is_upcoming(assignment):
+    """Check that an assignment record has a due date that hasn't passed yet."""
+    if assignment.due is None:
+        return False
+    return assignment.due > datetime.datetime.now(datetime.timezone.utc).timestamp()
+
+def get_task_due_timestamp(task):
+    """Get a Todoist task's due date as UTC epoch seconds, or None if it has none."""
+    due = getattr(task, 'due', None)
+    value = getattr(due, 'date', None) if due else None
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if not isinstance(value, datetime.datetime):
+        # All-day due dates count from the start of the day
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+def task_fields(assignment):
+    """Get the content, description and due date of an assignment record's task."""
+    return {
+        'content': f"Assignment: {assignment.name}",
+        'description': assignment.html_url,
+        # Canvas due dates are UTC, so Todoist shows them in the user's own timezone
+        'due': {'date': assignment.due_at} if assignment.due_at else None,
+    }
+
+def course_label_name(course_name):
+    """Get the Todoist label name for a course, without characters labels can't have."""
+    return ' '.join(''.join(c for c in course_name if c.isalnum() or c in ' -_').split())
+
+def is_assignment_task(task):
+    """Check whether a task looks like one this sync created for a Canvas assignment."""
+    return task.content.startswith("Assignment: ") and '/assignments/' in (task.description or '')
+
+def course_metadata(course):
+    """Get the fields of a course that are kept in the course cache."""
+    return {
+        'id': course.id,
+        'name': getattr(course, 'name', None),
+        'course_code': getattr(course, 'course_code', None),
+        'term': getattr(course, 'term', None),
+        'workflow_state': getattr(course, 'workflow_state', None),
+    }
+
+def get_course_name(course):
+    """Get the course name safely, with fallback options."""
+    try:
+        if hasattr(course, 'name'):
+            return course.name
+        elif hasattr(course, 'course_code'):
+            return course.course_code
+        else:
+            return f"Course {course.id}"
+    except Exception:
+        return f"Unknown Course {course.id if hasattr(course, 'id') else 'ID Unknown'}"
+
+# Let Canvas drop past-due assignments and the fields the sync never reads
+ASSIGNMENT_FILTERS = (
+    ('bucket', 'future'),
+    ('order_by', 'due_at'),
+    ('exclude_response_fields[]', 'description'),
+    ('exclude_response_fields[]', 'rubric'),
+    ('include[]', 'submission'),
+)
+
+# Due dates closer than this are treated as equal when comparing a task with Canvas
+DUE_TOLERANCE = 60
+
+# How far back the first cleanup looks for completed tasks. Todoist only
+# answers for up to three months at a time, so older cursors are clamped.
+COMPLETED_LOOKBACK = 14 * 24 * 60 * 60
+COMPLETED_MAX_RANGE = 89 * 24 * 60 * 60
+
+# How long the list of active courses is reused before asking Canvas again
+COURSE_CACHE_TTL = 12 * 60 * 60
+
+# Default number of API requests allowed in flight at once
+DEFAULT_CONCURRENCY = 10
+
+# Assignments fetched but not yet handed to the writer, and tasks queued but not yet
+# confirmed by Todoist. Fetching pauses while either is full.
+ASSIGNMENT_QUEUE_SIZE = 200
+MAX_PENDING_WRITES = 2 * MAX_COMMANDS
+
+# How assignments are listed: one listing per course ('courses'), the
+# calendar_events endpoint for several courses per request ('calendar'), or
+# GraphQL queries that cover every course at once ('graphql').
+# 'auto' uses the calendar from CALENDAR_MIN_COURSES courses on.
+FETCH_STRATEGIES = ('auto', 'courses', 'calendar', 'graphql')
+CALENDAR_MIN_COURSES = 10
+
+# Canvas answers calendar_events for at most this many courses per request
+CALENDAR_CONTEXTS_PER_REQUEST = 10
+
+# How far ahead the calendar strategy looks for due dates
+CALENDAR_WINDOW = 365 * 24 * 60 * 60
+
+def sync_from_config(config, **kwargs):
+    """Create a CanvasTodoistSync from the settings in config.json."""
+    return CanvasTodoistSync(
+        canvas_api_url=config["CANVAS_API_URL"],
+        canvas_api_key=config["CANVAS_API_KEY"],
+        todoist_api_key=config["TODOIST_API_KEY"],
+        user_id=int(config["CANVAS_USER_ID"]),
+        max_concurrency=int(config.get("MAX_CONCURRENCY", DEFAULT_CONCURRENCY)),
+        pool_size=int(config["HTTP_POOL_SIZE"]) if config.get("HTTP_POOL_SIZE") else None,
+        fetch_strategy=config.get("FETCH_STRATEGY", 'auto'),
+        **kwargs
+    )
+
+class CanvasTodoistSync:
+    def __init__(self, canvas_api_url, canvas_api_key, todoist_api_key, user_id,
+                 max_concurrency=DEFAULT_CONCURRENCY, todoist_sync_url=TODOIST_SYNC_URL, rate_limiter=None,
+                 task_cache=None, course_snapshot=None, tracer=None, pool_size=None,
+                 fetch_strategy='auto'):
+        """Initialize the sync with API credentials.
+
+        pool_size is the number of keep-alive connections per API, by default one per worker thread.
+        fetch_strategy is one of FETCH_STRATEGIES.
+        """
+        if fetch_strategy not in FETCH_STRATEGIES:
+            raise Exception(f"Unknown fetch strategy {fetch_strategy}; use one of {', '.join(FETCH_STRATEGIES)}")
+        self.fetch_strategy = fetch_strategy
+        try:
+            self.max_concurrency = max(1, int(max_concurrency))
+            self.pool_size = max(1, int(pool_size or self.max_concurrency))
+            # Created on first use and kept for every later sync, like the sessions
+            self.executor = None
+            # One limiter paces every Canvas and Todoist request
+            self.rate_limiter = rate_limiter or RateLimiter()
+            # Records phase timings and request counters when a trace file is set
+            self.tracer = tracer or Tracer()
+            self.canvas = Canvas(canvas_api_url, canvas_api_key)
+            # Shared requester so conditional requests reuse the Canvas session
+            self.requester = self.canvas._Canvas__requester
+            self.requester._session = self.rate_limiter.session('canvas', self.tracer, self.pool_size)
+            self.graphql = CanvasGraphQL(self.canvas)
+            todoist_session = self.rate_limiter.session('todoist', self.tracer, self.pool_size)
+            self.sessions = {'canvas': self.requester._session, 'todoist': todoist_session}
+            self.todoist = TodoistAPI(todoist_api_key, session=todoist_session)
+            # Writes, and incremental reads of tasks and labels, go through the Sync API
+            self.todoist_sync = TodoistSyncClient(todoist_api_key, todoist_sync_url, session=todoist_session)
+            self.user_id = int(user_id)
+            self.existing_task_set = set()
+            self.completed_tasks = []
+            self.course_cache = {}
+            self.task_cache = task_cache or TaskCache()
+            self.course_snapshot = course_snapshot or CourseSnapshot()
+            # Tasks and labels are read incrementally from the replica in the task cache
+            self.todoist_replica = TodoistReplica(self.todoist_sync, self.task_cache)
+            self.todoist_index = TodoistIndex(self.todoist, self.todoist_replica)
+            self.label_index = LabelIndex(self.task_cache)
+            self.unchanged_courses = []
+            self.course_results = {}  # Course ID -> whether it changed and its next due date, for the last sync
+            # Connections are checked by the first real request rather than up front
+            self.user = None
+            self.user_lock = threading.Lock()
+        except ValueError:
+            raise Exception("Invalid user ID. Please ensure it's a valid number.")
+        except Exception as e:
+            raise Exception(f"Failed to initialize: {str(e)}")
+
+    def get_user(self):
+        """Get the Canvas user, fetching it only the first time it is needed."""
+        with self.user_lock:
+            if self.user is None:
+                self.user = self.canvas.get_user(self.user_id)
+            return self.user
+
+    def check_canvas(self):
+        """Check the Canvas credentials by fetching the user."""
+        try:
+            return self.get_user()
+        except Exception as e:
+            raise Exception(f"Could not get user information from Canvas: {str(e)}")
+
+    def check_todoist(self):
+        """Check the Todoist credentials with a single small request."""
+        try:
+            next(iter(self.todoist.get_projects(limit=1)))
+        except StopIteration:
+            pass
+        except Exception as e:
+            raise Exception(f"Could not connect to Todoist: {str(e)}")
+
+    def validate_connections(self):
+        """Check the Canvas and Todoist credentials at the same time."""
+        executor = self.get_executor()
+        canvas_check = executor.submit(self.check_canvas)
+        todoist_check = executor.submit(self.check_todoist)
+        # Surface both failures when both credentials are wrong
+        errors = []
+        for check in (canvas_check, todoist_check):
+            try:
+                check.result()
+            except Exception as e:
+                errors.append(str(e))
+        if errors:
+            raise Exception("; ".join(errors))
+        return self.user
+
+    def get_courses(self, update_status, refresh=False):
+        """Get the user's active courses, from the course cache while it is fresh unless refresh is set."""
+        cached = None if refresh else self.task_cache.load_courses(COURSE_CACHE_TTL)
+        if cached is not None:
+            update_status(f"Using {len(cached)} cached courses")
+            courses = [Course(self.requester, data) for data in cached]
+        else:
+            update_status("Getting user information...")
+            user = self.get_user()
+            update_status(f"Got user: {user.name}")
+
+            update_status("Getting courses...")
+            # Concluded and unpublished courses are filtered out by Canvas
+            courses = [course for course in user.get_courses(
+                enrollment_state='active',
+                state=['available'],
+                include=['term']
+            ) if is_current_course(course)]
+            self.task_cache.save_courses([course_metadata(course) for course in courses])
+
+        self.course_cache = {course.id: course for course in courses}
+        return courses
+
+    def load_task_cache(self):
+        """Load the task cache, dropping tasks whose due dates have passed."""
+        try:
+            valid_tasks = self.task_cache.load()
+            print(f"Loaded {len(valid_tasks)} tasks from cache")
+            return valid_tasks
+        except Exception as e:
+            print(f"Error loading task cache: {str(e)}")
+            return set()
+
+    def save_task_cache(self):
+        """Save the current Todoist tasks to the task cache."""
+        try:
+            cache_data = {}
+            
+            # First, add all tasks from Todoist (already downloaded this run)
+            for task_id, task in self.todoist_index.tasks_by_key.items():
+                if hasattr(task, 'due') and task.due:
+                    due_date = task.due.date
+                    # The API client parses due dates into date/datetime objects
+                    cache_data[task_id] = due_date.isoformat() if hasattr(due_date, 'isoformat') else due_date
+                else:
+                    cache_data[task_id] = None
+            
+            changed = self.task_cache.update(cache_data)
+
+            # Then, ensure all tasks in our set are included
+            changed += self.task_cache.update(dict.fromkeys(self.existing_task_set), replace=False)
+            
+            print(f"Saved {changed} changed tasks to cache")
+        except Exception as e:
+            print(f"Error saving task cache: {str(e)}")
+
+    def fetch_existing_labels(self, update_status):
+        """Fetch existing Todoist labels."""
+        update_status("\nFetching existing Todoist labels...")
+        try:
+            self.label_index.load(self.todoist_index.load_labels())
+            
+            labels = self.label_index.names()
+            update_status(f"Found {len(labels)} existing labels")
+            if labels:
+                update_status("Labels found: " + ", ".join(labels))
+        except Exception as e:
+            if is_auth_error(e):
+                # The first Todoist request doubles as the connection check
+                raise Exception(f"Could not connect to Todoist: {str(e)}")
+            update_status(f"Error fetching labels: {str(e)}")
+            # Fall back to the labels known from earlier syncs so they aren't created again
+            update_status(f"Using {self.label_index.load()} labels from the last sync")
+
+    def fetch_existing_tasks(self, update_status):
+        """Fetch existing Todoist tasks."""
+        update_status("\nFetching existing Todoist tasks...")
+        try:
+            # Load cached tasks first
+            self.existing_task_set = self.load_task_cache()
+            update_status(f"Loaded {len(self.existing_task_set)} valid tasks from cache")
+            update_status(f"Loaded {self.task_cache.load_task_map()} assignment links from cache")
+            
+            # Fetch current tasks from Todoist once for the whole run
+            existing_tasks = self.todoist_index.load_tasks()
+            
+            # Update cache with current tasks
+            for task in existing_tasks:
+                self.existing_task_set.add(task_key(task))
+            
+            # Save updated cache
+            self.save_task_cache()
+            
+            update_status(f"Found {len(self.existing_task_set)} total unique tasks")
+            
+            # Debug: Show some existing tasks
+            if self.existing_task_set:
+                update_status("\nSample of existing tasks:")
+                for task_id in list(self.existing_task_set)[:5]:
+                    content, desc = task_id.split('|', 1)
+                    update_status(f"- {content}")
+        except Exception as e:
+            if is_auth_error(e):
+                raise Exception(f"Could not connect to Todoist: {str(e)}")
+            update_status(f"Error processing existing tasks: {str(e)}")
+            self.existing_task_set = set()
+
+    def fetch_completed_tasks(self, since, until):
+        """Download the tasks completed between since and until."""
+        return list(iter_items(self.todoist.get_completed_tasks_by_completion_date(
+            since=since, until=until, limit=200
+        )))
+
+    async def cleanup_completed_tasks(self, update_status):
+        """Remove course labels from assignment tasks completed since the last cleanup.
+
+        The end of each cleanup's time range is stored as a cursor, so every
+        run only downloads what was completed since. The cursor only moves
+        once every label removal succeeded.
+        """
+        try:
+            until = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+            cursor = self.task_cache.get_state('completed_since')
+            if cursor:
+                since = datetime.datetime.fromisoformat(cursor)
+            else:
+                since = until - datetime.timedelta(seconds=COMPLETED_LOOKBACK)
+            since = max(since, until - datetime.timedelta(seconds=COMPLETED_MAX_RANGE))
+
+            self.completed_tasks = await self.run_blocking(self.fetch_completed_tasks, since, until)
+            update_status(f"Found {len(self.completed_tasks)} tasks completed since the last sync")
+
+            course_labels = {label_key(course_label_name(name)) for name in self.task_cache.course_names()}
+            removals = []
+            for task in self.completed_tasks:
+                if not (self.task_cache.get_assignment(task.id) or is_assignment_task(task)):
+                    continue
+                labels = [label for label in (task.labels or []) if label_key(label) not in course_labels]
+                if len(labels) != len(task.labels or []):
+                    removals.append((task, self.batcher.add(make_command('item_update', {'id': task.id, 'labels': labels}))))
+
+            failed = 0
+            for task, removal in removals:
+                try:
+                    await removal
+                except Exception as e:
+                    failed += 1
+                    update_status(f"Error removing labels from {task.content}: {str(e)}")
+            if removals:
+                update_status(f"Removed course labels from {len(removals) - failed} completed tasks")
+            if not failed:
+                self.task_cache.set_state('completed_since', until.isoformat())
+        except Exception as e:
+            if is_auth_error(e):
+                raise Exception(f"Could not connect to Todoist: {str(e)}")
+            update_status(f"Error cleaning up completed tasks: {str(e)}")
+
+    def fetch_assignment_page(self, course, url=None):
+        """Fetch one page of a course's upcoming assignments.
+
+        Returns the page's assignments, the next page's URL and the response
+        headers, or None if the listing is unchanged since the last sync.
+        """
+        if url is None:
+            response = self.requester.request(
+                "GET",
+                f"courses/{course.id}/assignments",
+                headers=self.course_snapshot.get_validators(course.id),
+                _kwargs=list(ASSIGNMENT_FILTERS),
+                per_page=100
+            )
+            if response.status_code == 304:
+                return None
+        else:
+            response = self.requester.request("GET", _url=url)
+
+        # Only the fields the sync uses are kept, not the whole payload
+        assignments = [AssignmentRecord.from_json(data, course.id) for data in response.json()]
+
+        next_link = response.links.get('next')
+        return assignments, next_link['url'] if next_link else None, response.headers
+
+    async def process_course(self, course, update_status, assignments=None):
+        """Stream a course's upcoming assignments to the task writer one page at a time.
+
+        assignments, if given, are the course's assignments already taken
+        from a fetch of several courses, and the course isn't listed on its own.
+        """
+        course_name = get_course_name(course)
+        try:
+            if assignments is None:
+                fetch_page = self.tracer.wrap('fetch_assignment_page', self.fetch_assignment_page, course_id=course.id)
+                page = await self.run_blocking(fetch_page, course)
+                if page is None:
+                    self.unchanged_courses.append(course_name)
+                    self.course_results[course.id] = {'changed': False, 'next_due': None}
+                    return
+                assignments, next_url, headers = page
+                # Validators only cover the page they came with, so a listing
+                # that spans pages is never skipped on a 304 for its first page
+                validators = (None, None) if next_url else (headers.get('ETag'), headers.get('Last-Modified'))
+            else:
+                # Group fetches have no per-course validators for a conditional request
+                next_url, validators = None, (None, None)
+
+            entries = {}
+            found = 0
+            next_due = None
+            while True:
+                entries.update(assignment_entries(assignments))
+                for assignment in assignments:
+                    if is_upcoming(assignment):
+                        found += 1
+                        next_due = assignment.due if next_due is None else min(next_due, assignment.due)
+                        # Waits while the writer is behind, so fetching never runs far ahead of it
+                        await self.assignment_queue.put(('assignment', assignment, course))
+                    elif self.task_cache.get_task_id(course.id, assignment.id):
+                        # A linked assignment that lost its due date still needs its task updated
+                        await self.assignment_queue.put(('assignment', assignment, course))
+
+                if not next_url:
+                    break
+                assignments, next_url, _ = await self.run_blocking(fetch_page, course, next_url)
+
+            await self.check_missing_assignments(course, entries)
+        except InvalidAccessToken as e:
+            # Bad credentials fail the whole sync rather than every course in turn
+            raise Exception(f"Could not connect to Canvas: {str(e)}")
+        except (Forbidden, Unauthorized):
+            # Canvas won't show this course to the user; leave it out of the cached course list
+            update_status(f"Skipping course {course_name}: not authorized to read it")
+            self.task_cache.expire_course(course.id)
+            return
+        except Exception as e:
+            update_status(f"Error processing course {course_name}: {str(e)}")
+            return
+
+        unchanged = self.course_snapshot.is_unchanged(course.id, entries)
+        if unchanged:
+            self.unchanged_courses.append(course_name)
+        self.course_results[course.id] = {'changed': not unchanged, 'next_due': next_due}
+        self.course_snapshot.stage(course.id, *validators, entries)
+        if found:
+            update_status(f"\nFound {found} assignments in {course_name}")
+
+    def fetch_calendar_page(self, courses, url=None):
+        """Fetch one page of the upcoming assignments of up to CALENDAR_CONTEXTS_PER_REQUEST courses.
+
+        Returns the page's assignments and the next page's URL.
+        """
+        if url is None:
+            now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+            response = self.requester.request(
+                "GET",
+                "calendar_events",
+                _kwargs=[('type', 'assignment')]
+                        + [('context_codes[]', f"course_{course.id}") for course in courses]
+                        + [('start_date', format_timestamp(now)),
+                           ('end_date', format_timestamp(now + CALENDAR_WINDOW)),
+                           ('excludes[]', 'description'),
+                           ('include[]', 'submission')],
+                per_page=100
+            )
+        else:
+            response = self.requester.request("GET", _url=url)
+
+        assignments = []
+        for event in response.json():
+            data = event.get('assignment')
+            if not data:
+                continue
+            if 'submission' in event and 'submission' not in data:
+                data = dict(data, submission=event['submission'])
+            context_code = event.get('context_code') or ''
+            course_id = int(context_code[len('course_'):]) if context_code.startswith('course_') else None
+            assignments.append(AssignmentRecord.from_json(data, course_id))
+
+        next_link = response.links.get('next')
+        return assignments, next_link['url'] if next_link else None
+
+    def fetch_calendar(self, courses):
+        """Get the upcoming assignments of courses from the calendar as {course ID: [assignment records]}."""
+        fetch_page = self.tracer.wrap('fetch_calendar_page', self.fetch_calendar_page, courses=len(courses))
+        # Assignment ID -> record per course; overrides can list an assignment more than once
+        found = {course.id: {} for course in courses}
+        assignments, next_url = fetch_page(courses)
+        while True:
+            for assignment in assignments:
+                if assignment.course_id in found:
+                    found[assignment.course_id][assignment.id] = assignment
+            if not next_url:
+                break
+            assignments, next_url = fetch_page(courses, next_url)
+        return {course_id: list(records.values()) for course_id, records in found.items()}
+
+    async def process_course_group(self, courses, update_status, fetch_group, source):
+        """Fetch the assignments of several courses at once, then process each course.
+
+        fetch_group(courses) returns {course ID: [assignment records]}. If
+        it fails, the group's courses are listed one by one instead.
+        """
+        try:
+            found = await self.run_blocking(fetch_group, courses)
+        except InvalidAccessToken as e:
+            raise Exception(f"Could not connect to Canvas: {str(e)}")
+        except Exception as e:
+            update_status(f"Error fetching {len(courses)} courses from {source}, listing them one by one: {str(e)}")
+            await asyncio.gather(*(self.traced_process_course(course)(course, update_status) for course in courses))
+            return
+
+        await asyncio.gather(*(
+            self.traced_process_course(course)(course, update_status, found.get(course.id, [])) for course in courses
+        ))
+
+    def traced_process_course(self, course):
+        """Get process_course wrapped in a trace span on the course's own lane."""
+        return self.tracer.wrap('process_course', self.process_course, lane=f"course {course.id}", course_id=course.id)
+
+    def fetch_assignment(self, course, assignment_id):
+        """Fetch a single assignment as a record, or None if it no longer exists."""
+        try:
+            response = self.requester.request(
+                "GET",
+                f"courses/{course.id}/assignments/{assignment_id}",
+                _kwargs=[('include[]', 'submission')]
+            )
+        except ResourceDoesNotExist:
+            return None
+        return AssignmentRecord.from_json(response.json(), course.id)
+
+    async def check_missing_assignments(self, course, entries):
+        """Queue the linked assignments that dropped out of a course's upcoming list.
+
+        Each one is fetched on its own: if Canvas no longer has it its task is
+        deleted, otherwise its due date has moved into the past and the task
+        is reconciled like any other changed assignment.
+        """
+        for assignment_id, task_id in self.task_cache.get_course_tasks(course.id).items():
+            if str(assignment_id) in entries or task_id not in self.todoist_index.tasks:
+                continue
+            try:
+                assignment = await self.run_blocking(self.fetch_assignment, course, assignment_id)
+            except (Forbidden, Unauthorized):
+                # Hidden from the student, e.g. unpublished again; leave its task alone
+                continue
+            if assignment is None:
+                await self.assignment_queue.put(('delete', task_id, course))
+            else:
+                await self.assignment_queue.put(('assignment', assignment, course))
+
+    def threadsafe(self, update_status):
+        """Wrap update_status so worker threads report back through the event loop's thread."""
+        return lambda message: self.loop.call_soon_threadsafe(update_status, message)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Run a blocking API call in the worker pool, bounded by the global concurrency limit."""
+        async with self.semaphore:
+            return await self.loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def process_courses(self, update_status, course_ids=None, refresh_courses=False):
+        """Process all courses, or only course_ids, feeding their assignments to Todoist as each page arrives."""
+        courses = await self.run_blocking(self.tracer.wrap('get_courses', self.get_courses),
+                                          self.threadsafe(update_status), refresh_courses)
+        update_status(f"Found {len(courses)} courses")
+        if course_ids is not None:
+            courses = [course for course in courses if course.id in course_ids]
+            update_status(f"Polling {len(courses)} of them")
+
+        self.unchanged_courses = []
+        self.course_results = {}
+        strategy = self.fetch_strategy
+        if strategy == 'auto':
+            strategy = 'calendar' if len(courses) >= CALENDAR_MIN_COURSES else 'courses'
+
+        writer = asyncio.ensure_future(self.tracer.wrap('add_tasks', self.add_tasks, lane='writer')(update_status))
+        if strategy == 'calendar':
+            groups = [courses[start:start + CALENDAR_CONTEXTS_PER_REQUEST]
+                      for start in range(0, len(courses), CALENDAR_CONTEXTS_PER_REQUEST)]
+            update_status(f"Fetching assignments from the calendar, {CALENDAR_CONTEXTS_PER_REQUEST} courses per request")
+            await asyncio.gather(*(
+                self.tracer.wrap('process_course_group', self.process_course_group, lane=f"courses {number}",
+                                 courses=len(group))(group, update_status, self.fetch_calendar, "the calendar")
+                for number, group in enumerate(groups, 1)
+            ))
+        elif strategy == 'graphql':
+            update_status("Fetching assignments with GraphQL")
+            fetch_graphql = self.tracer.wrap('fetch_graphql', self.graphql.fetch_assignments, courses=len(courses))
+            await self.tracer.wrap('process_course_group', self.process_course_group, lane="courses",
+                                   courses=len(courses))(courses, update_status, fetch_graphql, "GraphQL")
+        else:
+            await asyncio.gather(*(self.traced_process_course(course)(course, update_status) for course in courses))
+        await self.assignment_queue.put(None)  # Tell the writer there is nothing more to come
+        await writer
+
+        if self.unchanged_courses:
+            update_status(f"\n{len(self.unchanged_courses)} courses unchanged since the last sync")
+
+    def ensure_label(self, course_name, update_status):
+        """Get the label name for a course, queueing its creation the first time it is needed."""
+        sanitized_name = course_label_name(course_name)
+        if not sanitized_name:  # Only create label if we have a valid name
+            return None
+
+        # Matched by normalized name, so an existing label is reused even if its case or spacing differs
+        label_name, create = self.label_index.claim(sanitized_name)
+        if create:
+            # Queued ahead of the tasks that use it, so it exists by the time they are added
+            future = self.batcher.add(make_command('label_add', {'name': label_name}, new_temp_id()))
+            future.add_done_callback(functools.partial(self.label_created, label_name, update_status))
+        return label_name
+
+    def label_created(self, label_name, update_status, future):
+        """Record the outcome of a queued label creation."""
+        try:
+            self.label_index.created(label_name, future.result())
+            update_status(f"Created course label: {label_name}")
+        except Exception as e:
+            update_status(f"Error creating course label {label_name}: {str(e)}")
+
+    def prepare_task(self, assignment, course, update_status):
+        """Build the task for an assignment, or None if it is already in Todoist."""
+        task = task_fields(assignment)
+        task_content = task['content']
+        
+        # Create a unique identifier for the task
+        task_id = f"{task_content}|{task['description']}"
+        
+        # Tasks linked by assignment ID are reconciled instead; this catches older, unlinked ones
+        if task_id in self.existing_task_set:
+            # Link tasks added before assignments were tracked by ID
+            existing_task = self.todoist_index.find_task(task_id)
+            if existing_task:
+                self.task_links.append((course.id, assignment.id, existing_task.id, assignment.due))
+            update_status(f"Skipping duplicate task: {task_content}")
+            return None
+
+        if assignment.submitted:
+            # Already handed in before it was ever synced, so there is nothing left to do
+            return None
+
+        # Store the Canvas due date for caching
+        self.cache_updates[task_id] = assignment.due
+
+        return task
+
+    def reconcile_task(self, assignment, course, task_id):
+        """Get the command that brings a linked task in line with Canvas, or None if nothing changed.
+
+        Only assignments that changed in Canvas since the last sync are
+        compared, so edits made in Todoist are kept until Canvas changes.
+        """
+        task = self.todoist_index.tasks.get(task_id)
+        if task is None:
+            # Completed or deleted in Todoist
+            return None
+        entry = assignment_entries([assignment])[str(assignment.id)]
+        previous = self.course_snapshot.get_entry(course.id, assignment.id)
+        if previous == entry:
+            return None
+
+        if assignment.submitted:
+            if not (previous and len(previous) > 2 and previous[2]):
+                return make_command('item_close', {'id': task_id})
+            return None
+
+        fields = task_fields(assignment)
+        changes = {}
+        if task.content != fields['content']:
+            changes['content'] = fields['content']
+        if (task.description or '') != fields['description']:
+            changes['description'] = fields['description']
+        task_due = get_task_due_timestamp(task)
+        canvas_due = assignment.due
+        if canvas_due is None:
+            if task_due is not None:
+                changes['due'] = None
+        elif task_due is None or abs(task_due - canvas_due) >= DUE_TOLERANCE:
+            changes['due'] = fields['due']
+        if not changes:
+            return None
+        return make_command('item_update', dict(changes, id=task_id))
+
+    async def add_tasks(self, update_status):
+        """Take assignments off the queue as they arrive and queue their tasks for the Sync API."""
+        writes = set()
+        while True:
+            item = await self.assignment_queue.get()
+            if item is None:
+                break
+
+            kind, payload, course = item
+            if kind == 'delete':
+                # The assignment is gone from Canvas; the payload is its task's ID
+                write = self.apply_change(make_command('item_delete', {'id': payload}), None, course, update_status)
+            else:
+                assignment = payload
+                try:
+                    task_id = self.task_cache.get_task_id(course.id, assignment.id)
+                    if task_id:
+                        command = self.reconcile_task(assignment, course, task_id)
+                        task = None
+                    else:
+                        command = None
+                        task = self.prepare_task(assignment, course, update_status)
+                except Exception as e:
+                    update_status(f"Error preparing task for {assignment.name}: {str(e)}")
+                    continue
+                if command:
+                    write = self.apply_change(command, assignment, course, update_status)
+                elif task:
+                    self.tasks_queued += 1
+                    write = self.add_task(task, assignment, course, update_status)
+                else:
+                    continue
+
+            # Waits while too many writes are outstanding, which in turn holds the course fetchers back
+            await self.write_slots.acquire()
+            write = asyncio.ensure_future(write)
+            writes.add(write)
+            write.add_done_callback(writes.discard)
+
+        if writes:
+            await asyncio.gather(*writes)
+
+    async def add_task(self, task, assignment, course, update_status):
+        """Add a single task, labelled with its course."""
+        # Only include course labels
+        label_name = self.ensure_label(get_course_name(course), update_status)
+        task_data = dict(task)
+        if label_name:  # Only include labels if we have valid ones
+            task_data['labels'] = [label_name]
+
+        try:
+            new_task_id = await self.batcher.add(make_command('item_add', task_data, new_temp_id()))
+            # Add to existing tasks set to prevent duplicates
+            self.existing_task_set.add(f"{task['content']}|{task['description']}")
+            if new_task_id:
+                self.task_links.append((course.id, assignment.id, new_task_id, assignment.due))
+            update_status(f"Added task: {task['content']}")
+        except Exception as e:
+            # Fetch this course in full next run so the task is retried
+            self.failed_writes.add((course.id, assignment.id))
+            update_status(f"Error adding task: {str(e)}")
+            update_status(f"Task data: {task_data}")  # Log the task data for debugging
+        finally:
+            self.write_slots.release()
+
+    async def apply_change(self, command, assignment, course, update_status):
+        """Update, complete or delete a linked task."""
+        task_id = command['args']['id']
+        try:
+            await self.batcher.add(command)
+            self.tasks_changed += 1
+            if command['type'] == 'item_delete':
+                self.task_cache.unmap_task(task_id)
+                update_status(f"Deleted task for a removed assignment in {get_course_name(course)}")
+            elif command['type'] == 'item_close':
+                update_status(f"Completed task: Assignment: {assignment.name}")
+            else:
+                fields = task_fields(assignment)
+                self.existing_task_set.add(f"{fields['content']}|{fields['description']}")
+                self.task_links.append((course.id, assignment.id, task_id, assignment.due))
+                update_status(f"Updated task: {fields['content']} ({', '.join(sorted(set(command['args']) - {'id'}))})")
+        except Exception as e:
+            # Fetch this course in full next run so the change is retried; a delete has no assignment entry
+            self.failed_writes.add((course.id, assignment.id if assignment else None))
+            update_status(f"Error updating task {task_id}: {str(e)}")
+        finally:
+            self.write_slots.release()
+
+    def save_task_links(self):
+        """Persist the assignment-to-task links made during this sync."""
+        try:
+            saved = self.task_cache.map_tasks(self.task_links)
+            self.task_links = []
+            if saved:
+                print(f"Linked {saved} assignments to Todoist tasks")
+        except Exception as e:
+            print(f"Error saving assignment links: {str(e)}")
+
+    def update_cache_with_canvas_dates(self, new_dates):
+        """Update the cache with Canvas due dates."""
+        try:
+            changed = self.task_cache.update(new_dates)
+            print(f"Updated cache with {changed} new dates")
+        except Exception as e:
+            print(f"Error updating cache with Canvas dates: {str(e)}")
+
+    def get_executor(self):
+        """Get the worker pool for blocking API calls, shared by every phase and every sync."""
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix='sync'
+            )
+        return self.executor
+
+    def close(self):
+        """Stop the worker pool and close the HTTP sessions and the task cache."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        for session in self.sessions.values():
+            session.close()
+        self.task_cache.close()
+
+    def write_trace(self, sync_start):
+        """Record the whole run as a span and write the trace file."""
+        try:
+            if self.tracer.enabled:
+                self.tracer.add_event('span', 'sync', sync_start, None, {})
+            self.tracer.flush()
+        except Exception as e:
+            print(f"Error writing trace: {str(e)}")
+
+    def sync(self, update_status, course_ids=None, refresh_courses=False):
+        """Perform the full sync process, optionally for only some courses.
+
+        refresh_courses asks Canvas for the course list even if the cached one is still fresh.
+        """
+        return asyncio.run(self.sync_async(update_status, course_ids, refresh_courses))
+
+    async def sync_async(self, update_status, course_ids=None, refresh_courses=False):
+        """Run the sync as one pipeline so Canvas fetches and Todoist writes overlap."""
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.get_executor()
+        # Kept across runs; only the changes since the last run are read and parsed
+        self.todoist_replica.reset()
+        # A failed run's staged courses are fetched again rather than committed by this one
+        self.course_snapshot.reset()
+        self.batcher = CommandBatcher(self.todoist_sync, self.run_blocking)
+        self.cache_updates = {}  # Store task IDs and their Canvas due dates
+        self.task_links = []  # New (course ID, assignment ID, task ID, due date) links
+        self.tasks_queued = 0
+        self.tasks_changed = 0
+        self.failed_writes = set()  # (course ID, assignment ID or None) of writes that failed
+        self.assignment_queue = asyncio.Queue(maxsize=ASSIGNMENT_QUEUE_SIZE)
+        self.write_slots = asyncio.Semaphore(MAX_PENDING_WRITES)
+        self.tracer.reset()
+        sync_start = self.tracer.now()
+        connections = {api: session.connections_opened() for api, session in self.sessions.items()}
+
+        try:
+            # Fetch existing data
+            await asyncio.gather(
+                self.run_blocking(self.tracer.wrap('fetch_existing_labels', self.fetch_existing_labels),
+                                  self.threadsafe(update_status)),
+                self.run_blocking(self.tracer.wrap('fetch_existing_tasks', self.fetch_existing_tasks),
+                                  self.threadsafe(update_status))
+            )
+            
+            # Clean up completed tasks while courses are processed and their new assignments added
+            await asyncio.gather(
+                self.tracer.wrap('cleanup_completed_tasks', self.cleanup_completed_tasks, lane='cleanup')(update_status),
+                self.tracer.wrap('process_courses', self.process_courses)(update_status, course_ids, refresh_courses)
+            )
+            await self.batcher.close()
+
+            if self.tasks_queued:
+                # Update cache with new tasks and their Canvas due dates
+                self.update_cache_with_canvas_dates(self.cache_updates)
+            else:
+                update_status("\nNo new assignments to add.")
+            if self.tasks_changed:
+                update_status(f"Brought {self.tasks_changed} existing tasks up to date")
+            self.save_task_links()
+
+            # Remember which courses are now up to date
+            for course_id, assignment_id in self.failed_writes:
+                self.course_snapshot.discard(course_id, assignment_id)
+            self.course_snapshot.commit()
+            
+            update_status("\nSync completed successfully!")
+            return True
+        except Exception as e:
+            update_status(f"\nError: {str(e)}")
+            return False
+        finally:
+            for api, session in self.sessions.items():
+                self.tracer.record_connections(api, session.connections_opened() - connections[api])
+            self.write_trace(sync_start)
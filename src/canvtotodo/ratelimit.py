@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Requests per second and burst size for each API
+CANVAS_RATE = 10.0
+CANVAS_BURST = 20
+TODOIST_RATE = 1.0
+TODOIST_BURST = 50
+
+# Canvas charges each request against a quota reported in X-Rate-Limit-Remaining.
+# Below this many units we slow down until the quota has had time to refill.
+CANVAS_LOW_WATER = 100.0
+CANVAS_REFILL_PER_SECOND = 10.0
+
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+def is_throttled(response):
+    """Check whether a response means the request was rate limited."""
+    if response.status_code in RETRY_STATUSES:
+        return True
+    # Canvas reports throttling as 403 Forbidden (Rate Limit Exceeded)
+    return response.status_code == 403 and 'Rate Limit Exceeded' in response.text
+
+def get_retry_after(response):
+    """Get the delay requested by a Retry-After header, in seconds."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+def backoff_delay(attempt):
+    """Get a jittered exponential backoff delay for a retry attempt."""
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * (2 ** attempt)))
+
+class TokenBucket:
+    """Thread-safe token bucket that can also be paused after throttling."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every request on this bucket for the given time."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class RateLimitedSession(requests.Session):
+    """Session that waits for its rate limiter and retries throttled requests."""
+
+    def __init__(self, limiter, api, tracer=None, pool_size=None):
+        super().__init__()
+        self.limiter = limiter
+        self.api = api
+        self.tracer = tracer
+        if pool_size:
+            # Keep a connection per worker thread alive instead of discarding the extras
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            self.mount('https://', adapter)
+            self.mount('http://', adapter)
+
+    def connections_opened(self):
+        """Count the connections opened so far by this session's live connection pools."""
+        opened = 0
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                opened += getattr(pool, 'num_connections', 0) if pool is not None else 0
+        return opened
+
+    def request(self, method, url, *args, **kwargs):
+        bucket = self.limiter.buckets[self.api]
+        attempt = 0
+        waited = 0.0
+        start = self.tracer.now() if self.tracer else None
+        while True:
+            wait_start = time.monotonic()
+            bucket.acquire()
+            waited += time.monotonic() - wait_start
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except Exception:
+                if self.tracer:
+                    self.tracer.record_request(self.api, method, url, None, start, waited, attempt, attempt)
+                raise
+            if self.api == 'canvas':
+                self.limiter.track_canvas_quota(response)
+            if not is_throttled(response) or attempt >= MAX_RETRIES:
+                if self.tracer:
+                    throttled = attempt + (1 if is_throttled(response) else 0)
+                    self.tracer.record_request(self.api, method, url, response, start, waited, attempt, throttled)
+                return response
+
+            delay = get_retry_after(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            print(f"Rate limited by {self.api} ({response.status_code}), retrying in {delay:.1f}s")
+            bucket.pause(delay)
+            attempt += 1
+
+class RateLimiter:
+    """Rate limits shared by every Canvas and Todoist request in a process."""
+
+    def __init__(self, canvas_rate=CANVAS_RATE, todoist_rate=TODOIST_RATE):
+        self.buckets = {
+            'canvas': TokenBucket(canvas_rate, CANVAS_BURST),
+            'todoist': TokenBucket(todoist_rate, TODOIST_BURST),
+        }
+        self.canvas_remaining = None
+
+    def session(self, api, tracer=None, pool_size=None):
+        """Create a session whose requests go through this limiter."""
+        return RateLimitedSession(self, api, tracer, pool_size)
+
+    def track_canvas_quota(self, response):
+        """Slow Canvas requests down as its reported quota runs low."""
+        try:
+            remaining = response.headers.get('X-Rate-Limit-Remaining')
+            if remaining is None:
+                return
+            self.canvas_remaining = float(remaining)
+        except ValueError:
+            return
+        if self.canvas_remaining < CANVAS_LOW_WATER:
+            self.buckets['canvas'].pause((CANVAS_LOW_WATER - self.canvas_remaining) / CANVAS_REFILL_PER_SECOND)
@@ -0,0 +1,102 @@
+import json
+import os
+from canvtotodo.config import get_application_path
+
+def get_snapshot_path():
+    """Get the path to the course snapshot file."""
+    return os.path.join(get_application_path(), 'course_snapshot.json')
+
+def assignment_entries(assignments):
+    """Build the snapshot entries (id -> updated_at, due timestamp, submitted) for a list of assignment records."""
+    entries = {}
+    for assignment in assignments:
+        entries[str(assignment.id)] = [assignment.updated_at, assignment.due, assignment.submitted]
+    return entries
+
+class CourseSnapshot:
+    """Persistent per-course record of the assignments seen on the last sync.
+
+    Each course keeps the ETag/Last-Modified validators of its assignment
+    listing, when it fits on one page, and the id, updated_at, due date and submission state of every
+    assignment in it, so the next run can send a conditional request, skip
+    unchanged courses and tell which assignments changed.
+    Changes are staged while a sync runs and only written once the sync has
+    handled them, so a failed run is retried in full next time.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_snapshot_path()
+        self.courses = {}
+        self.pending = {}
+        self.load()
+
+    def load(self):
+        """Load the snapshot from file."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.courses = json.load(f)
+                print(f"Loaded snapshot for {len(self.courses)} courses")
+        except Exception as e:
+            print(f"Error loading course snapshot: {str(e)}")
+            self.courses = {}
+
+    def get_validators(self, course_id):
+        """Get the conditional request headers for a course's assignment listing."""
+        entry = self.courses.get(str(course_id))
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_entry(self, course_id, assignment_id):
+        """Get the stored entry of one assignment, or None if it wasn't seen last sync."""
+        entry = self.courses.get(str(course_id))
+        if not entry:
+            return None
+        return entry.get('assignments', {}).get(str(assignment_id))
+
+    def is_unchanged(self, course_id, entries):
+        """Check whether a freshly fetched listing matches the stored one."""
+        entry = self.courses.get(str(course_id))
+        return entry is not None and entry.get('assignments') == entries
+
+    def stage(self, course_id, etag, last_modified, entries):
+        """Stage a course's new snapshot until the sync has handled it."""
+        self.pending[str(course_id)] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'assignments': entries,
+        }
+
+    def reset(self):
+        """Drop what an earlier run staged but never committed, e.g. because it failed."""
+        self.pending = {}
+
+    def discard(self, course_id, assignment_id=None):
+        """Forget a course's validators, and the entry of assignment_id if given, so its change is retried next run."""
+        for snapshot in (self.pending, self.courses):
+            entry = snapshot.get(str(course_id))
+            if entry:
+                entry['etag'] = entry['last_modified'] = None
+                if assignment_id is not None:
+                    entry.get('assignments', {}).pop(str(assignment_id), None)
+
+    def commit(self):
+        """Write staged course snapshots to file."""
+        if not self.pending:
+            return
+        try:
+            self.courses.update(self.pending)
+            self.pending = {}
+            # Write to a temporary file first so an interrupted run can't truncate the snapshot
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.courses, f)
+            os.replace(tmp_path, self.path)
+            print(f"Saved snapshot for {len(self.courses)} courses")
+        except Exception as e:
+            print(f"Error saving course snapshot: {str(e)}")
@@ -0,0 +1,328 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from canvtotodo.config import get_application_path
+
+def get_cache_path():
+    """Get the path to the task cache database."""
+    return os.path.join(get_application_path(), 'task_cache.db')
+
+def get_legacy_cache_path(directory=None):
+    """Get the path to the old JSON task cache."""
+    return os.path.join(directory or get_application_path(), 'task_cache.json')
+
+def remove_cache_files(path=None):
+    """Delete the task cache database, its WAL files and any legacy JSON cache."""
+    path = path or get_cache_path()
+    removed = False
+    for file_path in (path, path + '-wal', path + '-shm', get_legacy_cache_path()):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            removed = True
+    return removed
+
+def parse_due(value):
+    """Parse a cached due date into UTC epoch seconds, or None if it has none."""
+    if isinstance(value, int):
+        # Already epoch seconds, as on assignment records
+        return value
+    if not value:
+        return None
+    try:
+        due = datetime.datetime.fromisoformat(value.replace('Z', ''))
+    except ValueError:
+        # Entries with unreadable dates are kept, like entries without one
+        return None
+    if due.tzinfo is None:
+        due = due.replace(tzinfo=datetime.timezone.utc)
+    return int(due.timestamp())
+
+class TaskCache:
+    """SQLite store used to prevent duplicate tasks.
+
+    It holds the known task keys with their due dates, the links from
+    Canvas assignments (course ID, assignment ID) to the Todoist tasks
+    created for them, the metadata of the user's active courses and small
+    pieces of sync state such as API cursors, a replica of the user's
+    active Todoist tasks and labels, and the index of course labels by
+    normalized name. Due dates are stored as epoch seconds so expiring old
+    entries is a single indexed DELETE, and writes only touch the rows
+    that changed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_cache_path()
+        self.lock = threading.Lock()
+        self.known = {}  # Task key -> due epoch, as last read or written
+        self.task_ids = {}  # (course ID, assignment ID) -> Todoist task ID
+        self.assignments = {}  # Todoist task ID -> (course ID, assignment ID)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks (task_key TEXT PRIMARY KEY, due_at INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due_at ON tasks (due_at)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS assignment_tasks ("
+            "course_id INTEGER NOT NULL, assignment_id INTEGER NOT NULL, task_id TEXT NOT NULL, "
+            "due_at INTEGER, PRIMARY KEY (course_id, assignment_id))"
+        )
+        self.conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_assignment_tasks_task_id ON assignment_tasks (task_id)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS courses ("
+            "id INTEGER PRIMARY KEY, name TEXT, course_code TEXT, term TEXT, "
+            "workflow_state TEXT, fetched_at INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS todoist_items (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS todoist_labels (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS label_index (label_key TEXT PRIMARY KEY, name TEXT NOT NULL, label_id TEXT)"
+        )
+        self.conn.commit()
+        self.migrate_legacy_cache()
+
+    def migrate_legacy_cache(self):
+        """Import task_cache.json from older versions once, then remove it."""
+        legacy_path = get_legacy_cache_path(os.path.dirname(os.path.abspath(self.path)))
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, 'r') as f:
+                cache_data = json.load(f)
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tasks (task_key, due_at) VALUES (?, ?)",
+                    [(key, parse_due(due)) for key, due in cache_data.items()]
+                )
+            os.remove(legacy_path)
+            print(f"Migrated {len(cache_data)} tasks from {legacy_path}")
+        except Exception as e:
+            print(f"Error migrating legacy task cache: {str(e)}")
+
+    def load(self):
+        """Drop expired entries and return the remaining task keys."""
+        now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE due_at IS NOT NULL AND due_at <= ?", (now,))
+            rows = self.conn.execute("SELECT task_key, due_at FROM tasks").fetchall()
+        self.known = dict(rows)
+        return set(self.known)
+
+    def update(self, due_dates, replace=True):
+        """Store due dates for task keys, writing only the rows that changed.
+
+        With replace=False, keys that are already cached keep their due date.
+        """
+        changed = []
+        for key, due in due_dates.items():
+            due_at = parse_due(due)
+            if key in self.known and (not replace or self.known[key] == due_at):
+                continue
+            changed.append((key, due_at))
+        if not changed:
+            return 0
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO tasks (task_key, due_at) VALUES (?, ?) "
+                "ON CONFLICT(task_key) DO UPDATE SET due_at = excluded.due_at",
+                changed
+            )
+        self.known.update(changed)
+        return len(changed)
+
+    def load_task_map(self):
+        """Drop links to past-due assignments and load the assignment/task mapping."""
+        now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM assignment_tasks WHERE due_at IS NOT NULL AND due_at <= ?", (now,)
+            )
+            rows = self.conn.execute(
+                "SELECT course_id, assignment_id, task_id FROM assignment_tasks"
+            ).fetchall()
+        self.task_ids = {(course_id, assignment_id): task_id for course_id, assignment_id, task_id in rows}
+        self.assignments = {task_id: key for key, task_id in self.task_ids.items()}
+        return len(self.task_ids)
+
+    def get_task_id(self, course_id, assignment_id):
+        """Get the Todoist task ID linked to a Canvas assignment."""
+        return self.task_ids.get((course_id, assignment_id))
+
+    def get_course_tasks(self, course_id):
+        """Get the linked tasks of a course's assignments as {assignment ID: task ID}."""
+        return {assignment_id: task_id for (linked_course_id, assignment_id), task_id in self.task_ids.items()
+                if linked_course_id == course_id}
+
+    def get_assignment(self, task_id):
+        """Get the (course ID, assignment ID) linked to a Todoist task."""
+        return self.assignments.get(task_id)
+
+    def map_tasks(self, links):
+        """Link Canvas assignments to Todoist tasks.
+
+        Each link is a (course ID, assignment ID, task ID, due date) tuple.
+        """
+        rows = [(course_id, assignment_id, task_id, parse_due(due))
+                for course_id, assignment_id, task_id, due in links]
+        if not rows:
+            return 0
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO assignment_tasks (course_id, assignment_id, task_id, due_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(course_id, assignment_id) DO UPDATE SET "
+                "task_id = excluded.task_id, due_at = excluded.due_at",
+                rows
+            )
+        for course_id, assignment_id, task_id, _ in rows:
+            old_task_id = self.task_ids.get((course_id, assignment_id))
+            if old_task_id:
+                self.assignments.pop(old_task_id, None)
+            self.task_ids[(course_id, assignment_id)] = task_id
+            self.assignments[task_id] = (course_id, assignment_id)
+        return len(rows)
+
+    def unmap_task(self, task_id):
+        """Remove the link for a Todoist task."""
+        key = self.assignments.pop(task_id, None)
+        if key is None:
+            return
+        self.task_ids.pop(key, None)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM assignment_tasks WHERE task_id = ?", (task_id,))
+
+    def load_courses(self, ttl):
+        """Get cached course metadata, or None if it is missing or older than ttl seconds."""
+        oldest = int(datetime.datetime.now(datetime.timezone.utc).timestamp()) - ttl
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, name, course_code, term, workflow_state, fetched_at FROM courses"
+            ).fetchall()
+        if not rows or any(fetched_at < oldest for *_, fetched_at in rows):
+            return None
+        return [{
+            'id': course_id,
+            'name': name,
+            'course_code': course_code,
+            'term': json.loads(term) if term else None,
+            'workflow_state': workflow_state,
+        } for course_id, name, course_code, term, workflow_state, _ in rows]
+
+    def save_courses(self, courses):
+        """Replace the cached course metadata."""
+        now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        rows = [(
+            course['id'],
+            course.get('name'),
+            course.get('course_code'),
+            json.dumps(course['term']) if course.get('term') else None,
+            course.get('workflow_state'),
+            now,
+        ) for course in courses]
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM courses")
+            self.conn.executemany(
+                "INSERT INTO courses (id, name, course_code, term, workflow_state, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def expire_course(self, course_id):
+        """Drop one course from the course cache until the course list is next fetched."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+
+    def course_names(self):
+        """Get the names of every cached course, however old the cache is."""
+        with self.lock:
+            rows = self.conn.execute("SELECT name, course_code, id FROM courses").fetchall()
+        return [name or course_code or f"Course {course_id}" for name, course_code, course_id in rows]
+
+    def get_state(self, key):
+        """Get a stored piece of sync state, or None if it was never set."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key, value):
+        """Store a piece of sync state."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def load_label_index(self):
+        """Get the persisted label index as {normalized name: (label name, label ID)}."""
+        with self.lock:
+            rows = self.conn.execute("SELECT label_key, name, label_id FROM label_index").fetchall()
+        return {key: (name, label_id) for key, name, label_id in rows}
+
+    def save_label_index(self, labels, replace=False):
+        """Store label index entries, replacing the whole index if replace is set."""
+        with self.lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM label_index")
+            self.conn.executemany(
+                "INSERT INTO label_index (label_key, name, label_id) VALUES (?, ?, ?) "
+                "ON CONFLICT(label_key) DO UPDATE SET name = excluded.name, label_id = excluded.label_id",
+                [(key, name, label_id) for key, (name, label_id) in labels.items()]
+            )
+
+    def load_replica(self):
+        """Get the Todoist replica as (sync token, {task ID: item}, {label ID: label})."""
+        with self.lock:
+            token = self.conn.execute(
+                "SELECT value FROM sync_state WHERE key = 'todoist_sync_token'"
+            ).fetchone()
+            items = self.conn.execute("SELECT id, data FROM todoist_items").fetchall()
+            labels = self.conn.execute("SELECT id, data FROM todoist_labels").fetchall()
+        return (
+            token[0] if token else None,
+            {item_id: json.loads(data) for item_id, data in items},
+            {label_id: json.loads(data) for label_id, data in labels},
+        )
+
+    def save_replica(self, sync_token, full_sync, items, labels, removed_items, removed_labels):
+        """Apply a Sync API response to the Todoist replica and store its sync token.
+
+        A full sync replaces the replica; otherwise items and labels are
+        upserted and the removed IDs deleted. Everything is written in one
+        transaction so the token always matches the data.
+        """
+        with self.lock, self.conn:
+            if full_sync:
+                self.conn.execute("DELETE FROM todoist_items")
+                self.conn.execute("DELETE FROM todoist_labels")
+            self.conn.executemany(
+                "DELETE FROM todoist_items WHERE id = ?", [(item_id,) for item_id in removed_items]
+            )
+            self.conn.executemany(
+                "DELETE FROM todoist_labels WHERE id = ?", [(label_id,) for label_id in removed_labels]
+            )
+            self.conn.executemany(
+                "INSERT INTO todoist_items (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                [(item['id'], json.dumps(item)) for item in items]
+            )
+            self.conn.executemany(
+                "INSERT INTO todoist_labels (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                [(label['id'], json.dumps(label)) for label in labels]
+            )
+            self.conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES ('todoist_sync_token', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (sync_token,)
+            )
+
+    def close(self):
+        """Close the database connection."""
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,128 @@
+import threading
+
+def iter_items(pages):
+    """Flatten the paginated lists returned by the Todoist API client."""
+    for page in pages:
+        if isinstance(page, list):
+            yield from page
+        else:
+            yield page
+
+def task_key(task):
+    """Get the content|description key used to recognise a task."""
+    return f"{task.content}|{task.description if hasattr(task, 'description') else ''}"
+
+class TodoistIndex:
+    """In-memory index of the user's Todoist tasks and labels for one sync run.
+
+    Tasks and labels are each loaded once; every later lookup in the run
+    is answered from the index instead of listing them again. With a
+    replica they come from its incremental Sync API reads, falling back
+    to listing them over the REST API if that read fails.
+    """
+
+    def __init__(self, todoist, replica=None):
+        self.todoist = todoist
+        self.replica = replica
+        self.tasks = {}  # Task ID -> task
+        self.tasks_by_key = {}  # content|description -> task
+        self.labels = {}  # Label name -> label ID
+
+    def read_replica(self, index):
+        """Get the tasks (index 0) or labels (index 1) from the replica, or None if it can't be read."""
+        if self.replica is None:
+            return None
+        try:
+            return self.replica.refresh()[index]
+        except Exception as e:
+            print(f"Incremental Todoist sync failed, listing everything instead: {str(e)}")
+            return None
+
+    def load_tasks(self):
+        """Load every active task and index it."""
+        self.tasks = {}
+        self.tasks_by_key = {}
+        tasks = self.read_replica(0)
+        if tasks is None:
+            tasks = iter_items(self.todoist.get_tasks())
+        for task in tasks:
+            if hasattr(task, 'content'):
+                self.add_task(task)
+        return list(self.tasks.values())
+
+    def load_labels(self):
+        """Load every personal label and index it by name."""
+        self.labels = {}
+        labels = self.read_replica(1)
+        if labels is None:
+            labels = iter_items(self.todoist.get_labels())
+        for label in labels:
+            if hasattr(label, 'name') and hasattr(label, 'id'):
+                self.labels[label.name] = label.id
+        return self.labels
+
+    def add_task(self, task):
+        """Index a task."""
+        self.tasks[task.id] = task
+        self.tasks_by_key[task_key(task)] = task
+
+    def find_task(self, key):
+        """Look up a task by its content|description key."""
+        return self.tasks_by_key.get(key)
+
+def label_key(name):
+    """Normalize a label name the way Todoist compares them: case and spacing don't matter."""
+    return ' '.join(name.split()).casefold()
+
+class LabelIndex:
+    """Labels the sync uses, keyed by normalized name and persisted in the task cache.
+
+    load() refreshes it from the labels listed in Todoist, or keeps the
+    persisted index if they couldn't be listed. claim() hands out the name
+    to use for a label and reports whether the caller should create it, so
+    each missing label is created once however many workers ask for it.
+    """
+
+    def __init__(self, task_cache):
+        self.task_cache = task_cache
+        self.lock = threading.Lock()
+        self.labels = {}  # Normalized name -> (label name, label ID)
+        self.pending = {}  # Normalized name -> label name, for labels being created
+
+    def load(self, labels=None):
+        """Index the labels listed in Todoist as {name: ID}, or the persisted index if labels is None."""
+        if labels is None:
+            indexed = self.task_cache.load_label_index()
+        else:
+            indexed = {label_key(name): (name, label_id) for name, label_id in labels.items()}
+            if indexed != self.labels:
+                self.task_cache.save_label_index(indexed, replace=True)
+        with self.lock:
+            self.labels = indexed
+            # Creations that failed on an earlier run are tried again
+            self.pending = {}
+        return len(indexed)
+
+    def claim(self, name):
+        """Get the label name to use for name, and whether the caller must create the label."""
+        key = label_key(name)
+        with self.lock:
+            if key in self.labels:
+                return self.labels[key][0], False
+            if key in self.pending:
+                return self.pending[key], False
+            self.pending[key] = name
+            return name, True
+
+    def created(self, name, label_id):
+        """Record a label the caller created."""
+        key = label_key(name)
+        with self.lock:
+            self.pending.pop(key, None)
+            self.labels[key] = (name, label_id)
+        self.task_cache.save_label_index({key: (name, label_id)})
+
+    def names(self):
+        """Get the names of every indexed label."""
+        with self.lock:
+            return [name for name, _ in self.labels.values()]
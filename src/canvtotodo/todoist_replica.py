@@ -0,0 +1,140 @@
+import threading
+from todoist_api_python.models import Label, Task
+
+# Fields the Task model needs that Sync API items may leave out
+ITEM_DEFAULTS = {
+    'description': '',
+    'section_id': None,
+    'parent_id': None,
+    'labels': [],
+    'priority': 1,
+    'due': None,
+    'deadline': None,
+    'duration': None,
+    'collapsed': False,
+    'child_order': 0,
+    'responsible_uid': None,
+    'assigned_by_uid': None,
+    'completed_at': None,
+    'added_by_uid': '',
+    'added_at': '1970-01-01T00:00:00Z',
+    'updated_at': '1970-01-01T00:00:00Z',
+}
+
+LABEL_DEFAULTS = {
+    'color': 'charcoal',
+    'order': 0,
+    'is_favorite': False,
+}
+
+def task_from_item(item):
+    """Build a Task from a Sync API item."""
+    return Task.from_dict(dict(ITEM_DEFAULTS, **item))
+
+def label_from_item(item):
+    """Build a Label from a Sync API label."""
+    return Label.from_dict(dict(LABEL_DEFAULTS, **item))
+
+def is_removed(item):
+    """Whether a Sync API item or label left the active set."""
+    return bool(item.get('is_deleted') or item.get('checked'))
+
+class TodoistReplica:
+    """Local copy of the user's active Todoist tasks and labels.
+
+    The copy lives in the task cache together with the Sync API token it
+    matches. The first refresh downloads everything; every later one sends
+    the stored token and only patches in what changed since. The parsed
+    tasks and labels stay in memory, so a long-lived sync only parses the
+    changed items on each run.
+    """
+
+    RESOURCE_TYPES = ('items', 'labels')
+
+    def __init__(self, client, task_cache):
+        self.client = client
+        self.task_cache = task_cache
+        self.lock = threading.Lock()
+        self.sync_token = None
+        self.tasks = None  # Task ID -> task, loaded from the task cache on first use
+        self.labels = None  # Label ID -> label
+        self.current = False
+        self.error = None
+
+    def reset(self):
+        """Read the changes again on the next refresh, keeping the parsed replica."""
+        with self.lock:
+            self.current = False
+            self.error = None
+
+    def refresh(self):
+        """Bring the replica up to date once per run; later calls reuse the result or the error."""
+        with self.lock:
+            if self.error is not None:
+                raise self.error
+            if not self.current:
+                try:
+                    self.read()
+                except Exception as e:
+                    self.error = e
+                    raise
+                self.current = True
+            return list(self.tasks.values()), list(self.labels.values())
+
+    def load(self):
+        """Parse the replica stored in the task cache."""
+        self.sync_token, items, labels = self.task_cache.load_replica()
+        self.tasks = self.convert(items.values(), task_from_item)
+        self.labels = self.convert(labels.values(), label_from_item)
+
+    def read(self):
+        """Apply the changes since the stored sync token."""
+        if self.tasks is None:
+            self.load()
+        response = self.client.read(self.sync_token or '*', self.RESOURCE_TYPES)
+        full_sync = response.get('full_sync', True)
+        if full_sync:
+            self.tasks = {}
+            self.labels = {}
+
+        changed_items, removed_items = [], []
+        for item in response.get('items', []):
+            if is_removed(item):
+                removed_items.append(item['id'])
+            else:
+                changed_items.append(item)
+
+        changed_labels, removed_labels = [], []
+        for label in response.get('labels', []):
+            if is_removed(label):
+                removed_labels.append(label['id'])
+            else:
+                changed_labels.append(label)
+
+        self.task_cache.save_replica(
+            response['sync_token'], full_sync, changed_items, changed_labels, removed_items, removed_labels
+        )
+        self.apply(self.tasks, changed_items, removed_items, task_from_item)
+        self.apply(self.labels, changed_labels, removed_labels, label_from_item)
+        self.sync_token = response['sync_token']
+        print(f"Todoist replica: {'full sync' if full_sync else 'incremental sync'}, "
+              f"{len(changed_items) + len(removed_items)} task and "
+              f"{len(changed_labels) + len(removed_labels)} label changes")
+
+    def apply(self, models, changed, removed, build):
+        """Patch parsed tasks or labels with the changed and removed items."""
+        for item_id in removed:
+            models.pop(item_id, None)
+        for item in changed:
+            models.pop(item['id'], None)
+        models.update(self.convert(changed, build))
+
+    def convert(self, items, build):
+        """Convert replica rows to API models by ID, skipping any that no longer parse."""
+        converted = {}
+        for item in items:
+            try:
+                converted[item['id']] = build(item)
+            except Exception as e:
+                print(f"Skipping Todoist item {item.get('id')} from the replica: {str(e)}")
+        return converted
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import uuid
+import requests
+
+TODOIST_SYNC_URL = "https://api.todoist.com/api/v1/sync"
+
+# Todoist accepts at most 100 commands per Sync API request
+MAX_COMMANDS = 100
+
+def new_temp_id():
+    """Generate a temporary ID for an object created in a command batch."""
+    return str(uuid.uuid4())
+
+def make_command(command_type, args, temp_id=None):
+    """Build a Sync API command."""
+    command = {
+        'type': command_type,
+        'uuid': str(uuid.uuid4()),
+        'args': args,
+    }
+    if temp_id:
+        command['temp_id'] = temp_id
+    return command
+
+class TodoistSyncClient:
+    """Minimal client for the Todoist Sync API command queue."""
+
+    def __init__(self, api_key, sync_url=TODOIST_SYNC_URL, session=None):
+        self.api_key = api_key
+        self.sync_url = sync_url
+        self.session = session or requests.Session()
+
+    def post(self, data):
+        """Send one Sync API request and return the decoded response."""
+        response = self.session.post(
+            self.sync_url,
+            headers={'Authorization': f"Bearer {self.api_key}"},
+            data=data,
+            timeout=(10, 60)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def read(self, sync_token, resource_types):
+        """Read resources, in full for sync_token '*' or as changes since an earlier token."""
+        return self.post({
+            'sync_token': sync_token,
+            'resource_types': json.dumps(list(resource_types)),
+        })
+
+    def send_commands(self, commands):
+        """Send commands in batches of up to MAX_COMMANDS.
+
+        Returns the merged sync_status and temp_id_mapping of every batch.
+        """
+        sync_status = {}
+        temp_id_mapping = {}
+        for start in range(0, len(commands), MAX_COMMANDS):
+            batch = commands[start:start + MAX_COMMANDS]
+            result = self.post({'commands': json.dumps(batch)})
+            sync_status.update(result.get('sync_status', {}))
+            temp_id_mapping.update(result.get('temp_id_mapping', {}))
+        return sync_status, temp_id_mapping
+
+class CommandBatcher:
+    """Collects commands from concurrent coroutines and sends them as Sync API batches.
+
+    A batch is sent as soon as it is full, or once no new command has
+    arrived for `linger` seconds. Batches are sent one at a time in the
+    order their commands were queued, so a task can use a label created
+    earlier in the same or a previous batch.
+    """
+
+    def __init__(self, client, run_blocking, linger=0.25):
+        self.client = client
+        self.run_blocking = run_blocking
+        self.linger = linger
+        self.pending = []
+        self.flush_handle = None
+        self.in_flight = set()
+        self.send_lock = asyncio.Lock()
+
+    def add(self, command):
+        """Queue a command; the returned future resolves to the real ID of anything it created."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((command, future))
+        if len(self.pending) >= MAX_COMMANDS:
+            self.start_flush()
+        else:
+            self.schedule_flush()
+        return future
+
+    def schedule_flush(self):
+        """Send the pending commands once the queue has been quiet for a moment."""
+        if self.flush_handle:
+            self.flush_handle.cancel()
+        self.flush_handle = asyncio.get_running_loop().call_later(self.linger, self.start_flush)
+
+    def start_flush(self):
+        """Send the pending commands in the background."""
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending[:MAX_COMMANDS], self.pending[MAX_COMMANDS:]
+        task = asyncio.ensure_future(self.send(batch))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+        if self.pending:
+            self.start_flush()
+
+    async def send(self, batch):
+        """Send one batch and resolve the futures of its commands."""
+        commands = [command for command, _ in batch]
+        try:
+            async with self.send_lock:
+                sync_status, temp_id_mapping = await self.run_blocking(self.client.send_commands, commands)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for command, future in batch:
+            status = sync_status.get(command['uuid'], 'ok')
+            if future.done():
+                continue
+            if status == 'ok':
+                future.set_result(temp_id_mapping.get(command.get('temp_id')))
+            else:
+                future.set_exception(Exception(f"{command['type']} failed: {status}"))
+
+    async def close(self):
+        """Send anything still queued and wait for every batch to finish."""
+        self.start_flush()
+        while self.in_flight:
+            await asyncio.gather(*list(self.in_flight), return_exceptions=True)
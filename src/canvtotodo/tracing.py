@@ -0,0 +1,187 @@
+import bisect
+import contextlib
+import functools
+import inspect
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+# Upper bounds of the request latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+def new_api_stats():
+    """Create the request counters kept for one API."""
+    return {
+        'requests': 0,
+        'bytes': 0,
+        'retries': 0,
+        'throttled': 0,
+        'errors': 0,
+        'wait_seconds': 0.0,
+        'cost': 0.0,  # Quota used, as reported by Canvas's X-Request-Cost
+        'connections': 0,
+        'latency_ms': [0] * (len(LATENCY_BUCKETS) + 1),
+    }
+
+def request_cost(response):
+    """Get the quota cost a response reports, or 0 if it reports none."""
+    try:
+        return float(response.headers.get('X-Request-Cost') or 0) if response is not None else 0.0
+    except ValueError:
+        return 0.0
+
+class Tracer:
+    """Records timed spans and per-API request counters for each sync run.
+
+    Spans are kept per lane: the thread they ran on, or a named lane for
+    coroutines that overlap on the event loop thread. flush() writes the
+    run to path as JSON lines (appended, one object per span or request
+    and a closing summary) or as a Chrome trace (replaced each run). A
+    tracer without a path records nothing.
+    """
+
+    def __init__(self, path=None, trace_format='jsonl'):
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format}")
+        self.path = path
+        self.format = trace_format
+        self.enabled = path is not None
+        self.lock = threading.Lock()
+        self.run = 1
+        self.reset()
+
+    def reset(self):
+        """Start recording a new run."""
+        with self.lock:
+            self.origin = time.perf_counter()
+            self.started = time.time()
+            self.events = []  # (kind, name, start us, duration us, lane, args)
+            self.lanes = {}  # Lane name -> Chrome trace thread ID
+            self.apis = {}  # API name -> request counters
+
+    def now(self):
+        """Microseconds since the start of the run."""
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def add_event(self, kind, name, start, lane, args):
+        lane = lane or threading.current_thread().name
+        duration = self.now() - start
+        with self.lock:
+            self.lanes.setdefault(lane, len(self.lanes) + 1)
+            self.events.append((kind, name, start, duration, lane, args))
+
+    @contextlib.contextmanager
+    def span(self, name, lane=None, **args):
+        """Time the enclosed block as a span."""
+        if not self.enabled:
+            yield
+            return
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add_event('span', name, start, lane, args)
+
+    def wrap(self, name, func, lane=None, **args):
+        """Wrap a function or coroutine function so every call is recorded as a span."""
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def traced(*call_args, **call_kwargs):
+                with self.span(name, lane, **args):
+                    return await func(*call_args, **call_kwargs)
+        else:
+            @functools.wraps(func)
+            def traced(*call_args, **call_kwargs):
+                with self.span(name, lane, **args):
+                    return func(*call_args, **call_kwargs)
+        return traced
+
+    def record_request(self, api, method, url, response, start, waited, retries, throttled):
+        """Count a finished HTTP request and record it as a span.
+
+        start is the value of now() when the request was first sent, waited
+        the seconds spent held back by the rate limiter. response is None if
+        the request raised.
+        """
+        if not self.enabled:
+            return
+        latency = (self.now() - start) / 1000
+        size = len(response.content) if response is not None else 0
+        cost = request_cost(response)
+        with self.lock:
+            stats = self.apis.setdefault(api, new_api_stats())
+            stats['requests'] += 1
+            stats['bytes'] += size
+            stats['retries'] += retries
+            stats['throttled'] += throttled
+            stats['wait_seconds'] += waited
+            stats['cost'] += cost
+            if response is None or response.status_code >= 400:
+                stats['errors'] += 1
+            stats['latency_ms'][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.add_event('request', f"{api} {method} {urlparse(url).path}", start, None, {
+            'status': response.status_code if response is not None else None,
+            'bytes': size,
+            'retries': retries,
+        })
+
+    def record_connections(self, api, opened):
+        """Record how many new connections an API's session opened during the run."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.apis.setdefault(api, new_api_stats())['connections'] += opened
+
+    def summary(self):
+        """Get the request counters of the run, with the latency histograms keyed by bucket.
+
+        connection_reuse is the share of requests sent over an already open connection.
+        """
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}"]
+        with self.lock:
+            return {
+                api: dict(stats, wait_seconds=round(stats['wait_seconds'], 3), cost=round(stats['cost'], 3),
+                          latency_ms=dict(zip(labels, stats['latency_ms'])),
+                          connection_reuse=round(1 - min(stats['connections'], stats['requests']) / stats['requests'], 3)
+                          if stats['requests'] else None)
+                for api, stats in self.apis.items()
+            }
+
+    def flush(self):
+        """Write the run recorded so far to the trace file; the next run gets a new number."""
+        if not self.enabled:
+            return
+        summary = self.summary()
+        with self.lock:
+            events = list(self.events)
+            lanes = dict(self.lanes)
+            run = self.run
+            self.run += 1
+        duration = self.now()
+
+        if self.format == 'chrome':
+            trace_events = [
+                {'ph': 'M', 'name': 'thread_name', 'pid': 1, 'tid': tid, 'args': {'name': lane}}
+                for lane, tid in lanes.items()
+            ]
+            trace_events += [{
+                'ph': 'X', 'cat': kind, 'name': name, 'pid': 1, 'tid': lanes[lane],
+                'ts': round(start, 1), 'dur': round(length, 1), 'args': args,
+            } for kind, name, start, length, lane, args in events]
+            with open(self.path, 'w') as f:
+                json.dump({'traceEvents': trace_events, 'otherData': {'run': run, 'apis': summary}}, f)
+            return
+
+        with open(self.path, 'a') as f:
+            for kind, name, start, length, lane, args in events:
+                f.write(json.dumps({
+                    'type': kind, 'run': run, 'name': name, 'lane': lane,
+                    'start_ms': round(start / 1000, 3), 'duration_ms': round(length / 1000, 3), 'args': args,
+                }) + "\n")
+            f.write(json.dumps({
+                'type': 'summary', 'run': run, 'started': self.started,
+                'duration_ms': round(duration / 1000, 3), 'apis': summary,
+            }) + "\n")
@@ -0,0 +1,56 @@
+import os
+import pytest
+import todoist_api_python._core.endpoints as todoist_endpoints
+from canvtotodo.integration import CanvasTodoistSync
+from mock_servers import MockCanvas, MockTodoist
+from canvtotodo.ratelimit import RateLimiter
+from canvtotodo.snapshot import CourseSnapshot
+from canvtotodo.task_cache import TaskCache
+
+@pytest.fixture
+def canvas():
+    server = MockCanvas(courses=2, assignments=10).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def todoist(monkeypatch):
+    server = MockTodoist().start()
+    # The Todoist client has no base URL setting
+    monkeypatch.setattr(todoist_endpoints, 'API_URL', server.url + "/api/v1")
+    yield server
+    server.stop()
+
+@pytest.fixture
+def make_sync(canvas, todoist, tmp_path):
+    """Create a sync against the mock servers with caches kept in tmp_path."""
+    syncs = []
+
+    def make(**kwargs):
+        sync = CanvasTodoistSync(
+            canvas.url, "canvas-token", "todoist-token", 1,
+            todoist_sync_url=todoist.url + "/api/v1/sync",
+            rate_limiter=RateLimiter(canvas_rate=1e6, todoist_rate=1e6),
+            task_cache=TaskCache(os.path.join(tmp_path, 'task_cache.db')),
+            course_snapshot=CourseSnapshot(os.path.join(tmp_path, 'course_snapshot.json')),
+            **kwargs
+        )
+        syncs.append(sync)
+        return sync
+
+    yield make
+    for sync in syncs:
+        sync.close()
+
+@pytest.fixture
+def run_sync(make_sync):
+    """Run a sync with a new sync object against the mock servers; returns (ok, messages)."""
+    def run(**kwargs):
+        messages = []
+        sync = make_sync(**kwargs)
+        try:
+            ok = sync.sync(messages.append)
+        finally:
+            sync.close()
+        return ok, [message.strip() for message in messages]
+    return run
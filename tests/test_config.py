@@ -0,0 +1,51 @@
+import json
+import pytest
+from canvtotodo import config
+
+def test_files_of_older_versions_move_to_the_data_dir(tmp_path, monkeypatch):
+    legacy_dir = tmp_path / 'src'
+    legacy_dir.mkdir()
+    (legacy_dir / 'config.json').write_text(json.dumps({'CANVAS_USER_ID': "1"}))
+    (legacy_dir / 'task_cache.json').write_text("{}")
+    monkeypatch.setattr(config, 'LEGACY_DIR', str(legacy_dir))
+    monkeypatch.setattr(config.sys, 'platform', 'linux')
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+
+    path = config.get_config_path()
+
+    assert path == str(tmp_path / 'data' / 'canvtotodo' / 'config.json')
+    assert json.loads(open(path).read()) == {'CANVAS_USER_ID': "1"}
+    assert (tmp_path / 'data' / 'canvtotodo' / 'task_cache.json').exists()
+    assert not (legacy_dir / 'config.json').exists()
+
+def test_data_dir_files_are_not_replaced(tmp_path, monkeypatch):
+    legacy_dir = tmp_path / 'src'
+    legacy_dir.mkdir()
+    (legacy_dir / 'config.json').write_text("old")
+    data_dir = tmp_path / 'data' / 'canvtotodo'
+    data_dir.mkdir(parents=True)
+    (data_dir / 'config.json').write_text("new")
+    monkeypatch.setattr(config, 'LEGACY_DIR', str(legacy_dir))
+    monkeypatch.setattr(config.sys, 'platform', 'linux')
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+
+    config.get_data_dir()
+
+    assert (data_dir / 'config.json').read_text() == "new"
+    assert (legacy_dir / 'config.json').read_text() == "old"
+
+def write_accounts(tmp_path, names):
+    path = tmp_path / 'accounts.json'
+    path.write_text(json.dumps([{
+        'NAME': name, 'CANVAS_API_URL': "https://canvas.test/", 'CANVAS_API_KEY': "key",
+        'TODOIST_API_KEY': "key", 'CANVAS_USER_ID': "1",
+    } for name in names]))
+    return str(path)
+
+def test_accounts_load(tmp_path):
+    assert [account['NAME'] for account in config.load_accounts(write_accounts(tmp_path, ["a", "b"]))] == ["a", "b"]
+
+@pytest.mark.parametrize('names', [["a", "a"], ["a/b", "a_b"], ["Alice", "alice"]])
+def test_accounts_sharing_a_data_dir_are_rejected(tmp_path, names):
+    with pytest.raises(Exception, match="more than once|too alike"):
+        config.load_accounts(write_accounts(tmp_path, names))
@@ -0,0 +1,47 @@
+from canvtotodo.daemon import BASE_INTERVAL, FULL_SYNC_INTERVAL, JITTER, PollScheduler
+
+NOW = 1_000_000.0
+
+def scheduled(scheduler):
+    """Full sync of two unchanged courses without deadlines."""
+    scheduler.record({
+        1: {'changed': True, 'next_due': None},
+        2: {'changed': True, 'next_due': None},
+    }, full_sync=True, now=NOW)
+    return scheduler
+
+def test_full_sync_schedules_every_course():
+    scheduler = scheduled(PollScheduler())
+    assert set(scheduler.courses) == {1, 2}
+    assert scheduler.due_courses(NOW) == set()
+    assert scheduler.seconds_until_next(NOW) >= BASE_INTERVAL * (1 - JITTER)
+
+def test_polled_course_without_result_backs_off():
+    scheduler = scheduled(PollScheduler())
+    later = NOW + BASE_INTERVAL * 2
+    assert scheduler.due_courses(later) == {1, 2}
+
+    # Course 2 was skipped (unreadable, failed or filtered out) and has no result
+    scheduler.record({1: {'changed': False, 'next_due': None}}, full_sync=False, course_ids={1, 2}, now=later)
+
+    assert scheduler.due_courses(later) == set()
+    assert scheduler.courses[2]['next_poll'] > later + BASE_INTERVAL
+    assert scheduler.courses[2]['interval'] == 2 * BASE_INTERVAL
+    assert scheduler.seconds_until_next(later) > 1.0
+
+def test_poll_with_no_results_does_not_spin():
+    scheduler = scheduled(PollScheduler())
+    later = NOW + BASE_INTERVAL * 2
+    scheduler.record({}, full_sync=False, course_ids={1, 2}, now=later)
+    assert scheduler.due_courses(later) == set()
+    assert scheduler.seconds_until_next(later) > 1.0
+
+def test_full_sync_drops_missing_courses():
+    scheduler = scheduled(PollScheduler())
+    later = NOW + FULL_SYNC_INTERVAL * 2
+    assert scheduler.due_courses(later) is None
+
+    scheduler.record({1: {'changed': False, 'next_due': None}}, full_sync=True, now=later)
+
+    assert set(scheduler.courses) == {1}
+    assert scheduler.seconds_until_next(later) > 1.0
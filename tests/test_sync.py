@@ -0,0 +1,159 @@
+import json
+import os
+import pytest
+from canvtotodo.task_cache import TaskCache
+
+def assignment_tasks(todoist):
+    return sorted(task['content'] for task in todoist.tasks.values())
+
+@pytest.mark.parametrize('strategy', ['courses', 'calendar', 'graphql'])
+def test_unreadable_course_does_not_fail_the_sync(canvas, todoist, run_sync, strategy):
+    canvas.unauthorized.add(1)
+
+    ok, messages = run_sync(fetch_strategy=strategy)
+
+    assert ok
+    assert len(todoist.tasks) == len(canvas.upcoming(2))
+    assert any("Skipping course Course 1" in message for message in messages)
+
+    # The other courses stay cached, and the unreadable one isn't asked for again
+    ok, messages = run_sync(fetch_strategy=strategy)
+
+    assert ok
+    assert "Using 1 cached courses" in messages
+    assert not any("Skipping course Course 1" in message for message in messages)
+
+def test_hidden_linked_assignment_keeps_its_task(canvas, todoist, run_sync):
+    assert run_sync()[0]
+    hidden = canvas.upcoming(1)[0]
+    canvas.remove(1, hidden['id'])
+    canvas.unauthorized.add(hidden['id'])
+    before = assignment_tasks(todoist)
+
+    ok, _ = run_sync()
+
+    assert ok
+    assert assignment_tasks(todoist) == before
+
+def test_change_past_the_first_page_is_picked_up(canvas, todoist, run_sync):
+    canvas.max_per_page = 2
+    assert run_sync()[0]
+    last = canvas.upcoming(1)[-1]
+    canvas.rename(1, last['id'], "Renamed on a later page")
+
+    ok, _ = run_sync()
+
+    assert ok
+    assert "Assignment: Renamed on a later page" in assignment_tasks(todoist)
+
+def task_for(todoist, assignment):
+    """The open task of an assignment, found by the assignment URL in its description."""
+    for task in todoist.tasks.values():
+        if assignment['html_url'] in task['description']:
+            return task
+    return None
+
+def test_assignment_changes_reach_their_tasks(canvas, todoist, run_sync):
+    assert run_sync()[0]
+    renamed, submitted, removed = canvas.upcoming(1)[:3]
+    canvas.rename(1, renamed['id'], "Renamed")
+    canvas.submit(1, submitted['id'])
+    canvas.remove(1, removed['id'])
+
+    ok, _ = run_sync()
+
+    assert ok
+    assert task_for(todoist, renamed)['content'] == "Assignment: Renamed"
+    assert task_for(todoist, submitted) is None
+    assert any(submitted['html_url'] in task['description'] for task in todoist.completed.values())
+    assert task_for(todoist, removed) is None
+    assert len(todoist.tasks) == len(canvas.upcoming(1)) + len(canvas.upcoming(2)) - 1
+
+def test_failed_update_is_retried_alone(canvas, todoist, run_sync, tmp_path):
+    assert run_sync()[0]
+    failing, other = canvas.upcoming(1)[:2]
+    original = f"Assignment: {failing['name']}"
+    canvas.rename(1, failing['id'], "Renamed first")
+    canvas.rename(1, other['id'], "Renamed second")
+    todoist.failing.add(task_for(todoist, failing)['id'])
+
+    assert run_sync()[0]
+    assert task_for(todoist, failing)['content'] == original
+    assert task_for(todoist, other)['content'] == "Assignment: Renamed second"
+    with open(tmp_path / 'course_snapshot.json') as f:
+        snapshot = json.load(f)['1']
+    assert str(failing['id']) not in snapshot['assignments']
+    assert str(other['id']) in snapshot['assignments']
+    assert snapshot['etag'] is None
+
+    todoist.failing.clear()
+    assert run_sync()[0]
+    assert task_for(todoist, failing)['content'] == "Assignment: Renamed first"
+
+def test_failed_run_does_not_leave_its_snapshot_behind(canvas, todoist, make_sync):
+    sync = make_sync()
+    assert sync.sync(print)
+    renamed = canvas.upcoming(1)[0]
+    canvas.rename(1, renamed['id'], "Renamed")
+    # A linked assignment of course 2 drops out and can't be read back, failing the run
+    revoked = canvas.upcoming(2)[0]
+    canvas.remove(2, revoked['id'])
+    canvas.revoked.add(revoked['id'])
+
+    assert not sync.sync(print)
+    canvas.revoked.clear()
+    assert sync.sync(print, course_ids={2})
+    assert sync.sync(print, refresh_courses=True)
+
+    assert task_for(todoist, renamed)['content'] == "Assignment: Renamed"
+
+def test_assignment_submitted_before_its_first_sync_gets_no_task(canvas, todoist, run_sync):
+    submitted = canvas.upcoming(1)[0]
+    canvas.submit(1, submitted['id'])
+
+    assert run_sync()[0]
+    assert run_sync()[0]
+
+    assert task_for(todoist, submitted) is None
+    assert len(todoist.tasks) == len(canvas.upcoming(1)) + len(canvas.upcoming(2)) - 1
+
+def test_course_label_with_special_characters_is_created_once(canvas, todoist, run_sync):
+    canvas.courses[0]['name'] = "Math & Sci: A/B"
+
+    assert run_sync()[0]
+    assert run_sync()[0]
+
+    math_labels = [label for label in todoist.labels.values() if label['name'].startswith("Math")]
+    assert [label['name'] for label in math_labels] == ["Math Sci AB"]
+    for assignment in canvas.upcoming(1):
+        assert task_for(todoist, assignment)['labels'] == ["Math Sci AB"]
+
+def completed_since(tmp_path, value=None):
+    """Get, or first set, the cursor of the completed task cleanup."""
+    task_cache = TaskCache(os.path.join(tmp_path, 'task_cache.db'))
+    try:
+        if value is not None:
+            task_cache.set_state('completed_since', value)
+        return task_cache.get_state('completed_since')
+    finally:
+        task_cache.close()
+
+def test_completed_task_loses_its_course_label(canvas, todoist, run_sync, tmp_path):
+    assert run_sync()[0]
+    earlier = completed_since(tmp_path, "2000-01-01T00:00:00+00:00")
+    first, second = (task_for(todoist, assignment) for assignment in canvas.upcoming(1)[:2])
+    assert first['labels'] == ["Course 1"]
+    todoist.close_task(first['id'])
+    todoist.close_task(second['id'])
+    todoist.failing.add(second['id'])
+
+    assert run_sync()[0]
+    assert todoist.completed[first['id']]['labels'] == []
+    assert todoist.completed[second['id']]['labels'] == ["Course 1"]
+    # A failed removal keeps the cursor, so the next run looks at the same tasks again
+    assert completed_since(tmp_path) == earlier
+
+    todoist.failing.clear()
+    assert run_sync()[0]
+    assert todoist.completed[second['id']]['labels'] == []
+    assert completed_since(tmp_path) > earlier
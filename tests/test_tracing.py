@@ -0,0 +1,26 @@
+import json
+import pytest
+from canvtotodo.tracing import Tracer
+
+@pytest.mark.parametrize('strategy', ['courses', 'calendar', 'graphql'])
+def test_every_course_gets_a_span(canvas, run_sync, tmp_path, strategy):
+    path = tmp_path / 'trace.jsonl'
+
+    ok, _ = run_sync(fetch_strategy=strategy, tracer=Tracer(str(path)))
+
+    assert ok
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = [event for event in events if event['type'] == 'span' and event['name'] == 'process_course']
+    assert sorted(span['args']['course_id'] for span in spans) == [course['id'] for course in canvas.courses]
+    assert {span['lane'] for span in spans} == {f"course {course['id']}" for course in canvas.courses}
+
+def test_summary_adds_up_canvas_request_cost(canvas, run_sync, tmp_path):
+    path = tmp_path / 'trace.jsonl'
+
+    assert run_sync(fetch_strategy='courses', tracer=Tracer(str(path)))[0]
+
+    summary = [json.loads(line) for line in path.read_text().splitlines()][-1]
+    assert summary['type'] == 'summary'
+    # The mock Canvas charges 0.5 for each paginated listing: the course list and one page per course
+    assert summary['apis']['canvas']['cost'] == 0.5 * (1 + len(canvas.courses))
+    assert summary['apis']['todoist']['cost'] == 0